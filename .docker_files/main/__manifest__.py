@@ -14,6 +14,7 @@
         "commission",
         "commission_intercompany_service",
         "commission_payroll_preparation",
+        "commission_queue_job",
         "crm_assign_by_area",
         "crm_assign_in_house",
         "crm_brand",
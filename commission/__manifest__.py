@@ -3,7 +3,7 @@
 
 {
     "name": "Commission",
-    "version": "1.1.0",
+    "version": "1.2.0",
     "author": "Numigi",
     "maintainer": "Numigi",
     "website": "https://bit.ly/numigi-com",
@@ -27,6 +27,7 @@
         "views/commission_target.xml",
         "views/commission_category.xml",
         "views/menus.xml",
+        "data/ir_cron.xml",
         "data/ir_sequence.xml",
     ],
     "installable": True,
@@ -0,0 +1,26 @@
+# © 2021 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from openupgradelib.openupgrade import logged_query, table_exists
+
+
+def migrate(cr, version):
+    if not version or not table_exists(cr, "commission_target_invoice_line_rel"):
+        return
+
+    logged_query(
+        cr,
+        """
+        INSERT INTO commission_target_line (
+            target_id, invoice_line_id, amount, reason,
+            create_uid, create_date, write_uid, write_date
+        )
+        SELECT rel.target_id, rel.invoice_line_id, line.price_subtotal_signed,
+            'included', 1, now() at time zone 'UTC', 1, now() at time zone 'UTC'
+        FROM commission_target_invoice_line_rel rel
+        JOIN account_invoice_line line ON line.id = rel.invoice_line_id
+        ON CONFLICT DO NOTHING
+        """,
+    )
+
+    logged_query(cr, "DROP TABLE commission_target_invoice_line_rel")
@@ -2,9 +2,13 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
 from . import (
+    account_invoice,
     account_invoice_line,
     commission_target_rate,
     commission_target,
+    commission_target_line,
     commission_category_rate,
     commission_category,
+    crm_team,
+    res_users,
 )
@@ -0,0 +1,41 @@
+# © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import api, fields, models, tools
+
+
+class AccountInvoice(models.Model):
+
+    _inherit = "account.invoice"
+
+    commission_update_date = fields.Datetime(
+        readonly=True,
+        copy=False,
+        index=True,
+        help="Last time the invoice was changed in a way that may impact commissions.",
+    )
+
+    @api.model
+    def create(self, vals):
+        vals = dict(vals, commission_update_date=fields.Datetime.now())
+        return super().create(vals)
+
+    @api.multi
+    def write(self, vals):
+        if any(f in vals for f in self._get_commission_trigger_fields()):
+            vals = dict(vals, commission_update_date=fields.Datetime.now())
+        return super().write(vals)
+
+    @api.model
+    def _get_commission_trigger_fields(self):
+        return ("state", "user_id", "date_invoice", "company_id")
+
+    def init(self):
+        """Index the columns used to select the invoices of a commission target."""
+        super().init()
+        tools.create_index(
+            self._cr,
+            "account_invoice_commission_index",
+            self._table,
+            ["user_id", "date_invoice", "state", "type"],
+        )
@@ -8,11 +8,11 @@ class AccountInvoiceLine(models.Model):
 
     _inherit = "account.invoice.line"
 
+    commission_target_line_ids = fields.One2many(
+        "commission.target.line", "invoice_line_id", readonly=True
+    )
     commission_target_ids = fields.Many2many(
-        "commission.target",
-        "commission_target_invoice_line_rel",
-        "invoice_line_id",
-        "target_id",
+        "commission.target", compute="_compute_commission_target_ids"
     )
 
     commission_target_count = fields.Integer(
@@ -20,7 +20,37 @@ class AccountInvoiceLine(models.Model):
         store=True,
     )
 
-    @api.depends('commission_target_ids.state')
+    commission_tag_ids = fields.Many2many(
+        "sale.order.tag",
+        "account_invoice_line_commission_tag_rel",
+        "invoice_line_id",
+        "tag_id",
+        "Commission Tags",
+        compute="_compute_commission_tag_ids",
+        compute_sudo=True,
+        store=True,
+    )
+
+    @api.depends("sale_line_ids.order_id.so_tag_ids")
+    def _compute_commission_tag_ids(self):
+        for line in self:
+            orders = line._get_commission_sale_orders()
+            line.commission_tag_ids = orders.mapped("so_tag_ids")
+
+    def _get_commission_sale_orders(self):
+        return self.mapped("sale_line_ids.order_id")[:1]
+
+    @api.depends("commission_target_line_ids.reason")
+    def _compute_commission_target_ids(self):
+        for line in self:
+            line.commission_target_ids = line.commission_target_line_ids.filtered(
+                lambda l: l.reason == "included"
+            ).mapped("target_id")
+
+    @api.depends(
+        "commission_target_line_ids.reason",
+        "commission_target_line_ids.target_id.state",
+    )
     def _compute_commission_target_count(self):
         for line in self:
             targets = line.commission_target_ids.filtered(
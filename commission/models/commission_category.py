@@ -1,7 +1,8 @@
 # © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
-from odoo import fields, models, api
+from collections import defaultdict, deque
+from odoo import fields, models, api, _
 from odoo.exceptions import ValidationError
 
 
@@ -52,16 +53,97 @@ class CommissionCategory(models.Model):
     )
     filter_by_company = fields.Boolean()
 
-    def _sorted_by_dependencies(self):
-        return self.sorted(lambda c: len(c._get_all_children()))
+    def simulate(self, date_range_id, fixed_rate=None, slices=None):
+        """Simulate the commissions of the targets of the categories.
 
-    def _get_all_children(self):
-        children = self.mapped("child_category_ids")
+        See commission.target.simulate for the parameters and result.
 
-        if children:
-            children |= children._get_all_children()
+        :param date_range_id: the id of the period of the targets to simulate
+        """
+        targets = self.env["commission.target"].search(
+            [
+                ("category_id", "in", self.ids),
+                ("date_range_id", "=", date_range_id),
+                ("state", "!=", "cancelled"),
+            ]
+        )
+        return targets.simulate(fixed_rate=fixed_rate, slices=slices)
 
-        return children
+    def _get_dependency_levels(self):
+        """Group the categories per level of dependency.
+
+        Categories without child category are at level 0.
+        A category only depends on categories of lower levels,
+        so the categories of a same level can be processed together.
+
+        :return: a list of recordsets of categories, ordered by level.
+        """
+        level_per_category = self._get_dependency_level_per_category()
+        category_ids_per_level = defaultdict(list)
+        for category in self:
+            category_ids_per_level[level_per_category[category.id]].append(category.id)
+        return [
+            self.browse(category_ids_per_level[level])
+            for level in sorted(category_ids_per_level)
+        ]
+
+    def _get_dependency_level_per_category(self):
+        """Get the dependency level of the categories and all their children.
+
+        The levels are computed with a topological sort of the dependency graph.
+
+        :raises ValidationError: if the graph contains a cycle.
+        :return: a dictionary mapping category ids to their level.
+        """
+        children_per_category = self._get_children_graph()
+        parents_per_category = defaultdict(list)
+        for category_id, child_ids in children_per_category.items():
+            for child_id in child_ids:
+                parents_per_category[child_id].append(category_id)
+
+        remaining_children = {
+            category_id: len(child_ids)
+            for category_id, child_ids in children_per_category.items()
+        }
+        ready = deque(c for c, count in remaining_children.items() if not count)
+        level_per_category = {}
+
+        while ready:
+            category_id = ready.popleft()
+            child_levels = (
+                level_per_category[c] for c in children_per_category[category_id]
+            )
+            level_per_category[category_id] = max(child_levels, default=-1) + 1
+
+            for parent_id in parents_per_category[category_id]:
+                remaining_children[parent_id] -= 1
+                if not remaining_children[parent_id]:
+                    ready.append(parent_id)
+
+        if len(level_per_category) < len(children_per_category):
+            raise ValidationError(
+                _("The child categories contain a circular dependency.")
+            )
+
+        return level_per_category
+
+    def _get_children_graph(self):
+        """Get the child category ids of the categories and all their children.
+
+        Each level of children is read with a single query.
+        """
+        children_per_category = {}
+        categories = self
+
+        while categories:
+            for category in categories:
+                children_per_category[category.id] = category.child_category_ids.ids
+
+            categories = categories.mapped("child_category_ids").filtered(
+                lambda c: c.id not in children_per_category
+            )
+
+        return children_per_category
 
     @api.constrains("child_category_ids")
     def _validate_slices(self):
@@ -69,6 +151,10 @@ class CommissionCategory(models.Model):
             if category in category.child_category_ids:
                 raise ValidationError("You cannot assign a child category to itself.")
 
+    @api.constrains("child_category_ids")
+    def _validate_dependency_cycles(self):
+        self._get_dependency_level_per_category()
+
     @api.constrains("included_tag_ids", "excluded_tag_ids")
     def _validate_tags(self):
         for category in self:
@@ -1,10 +1,17 @@
 # © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
 from odoo import fields, models, api, _
 from odoo.exceptions import AccessError
-from odoo.osv.expression import AND
+from odoo.osv.expression import AND, OR
+from .commission_target_rate import evaluate_slices
+
+# Invoices changed in a transaction committed after the beginning of an
+# incremental compute are not visible to it. The changed invoices are searched
+# with a safety margin, so that they are processed by the next compute.
+COMMISSION_UPDATE_MARGIN = timedelta(minutes=30)
 
 
 class CommissionTarget(models.Model):
@@ -73,11 +80,13 @@ class CommissionTarget(models.Model):
     date_start = fields.Date(related="date_range_id.date_start", store=True)
     date_end = fields.Date(related="date_range_id.date_end", store=True)
     last_compute_date = fields.Datetime(readonly=True)
+    ledger_line_ids = fields.One2many(
+        "commission.target.line", "target_id", readonly=True, copy=False
+    )
     invoice_line_ids = fields.Many2many(
         "account.invoice.line",
-        "commission_target_invoice_line_rel",
-        "target_id",
-        "invoice_line_id",
+        compute="_compute_invoice_line_ids",
+        inverse="_inverse_invoice_line_ids",
     )
     child_target_ids = fields.Many2many(
         "commission.target",
@@ -125,6 +134,22 @@ class CommissionTarget(models.Model):
 
         return target
 
+    @api.depends("ledger_line_ids.reason")
+    def _compute_invoice_line_ids(self):
+        for target in self:
+            target.invoice_line_ids = target.ledger_line_ids.filtered(
+                lambda l: l.reason == "included"
+            ).mapped("invoice_line_id")
+
+    def _inverse_invoice_line_ids(self):
+        for target in self:
+            target._update_ledger(
+                {
+                    line.id: ("included", line.price_subtotal_signed)
+                    for line in target.invoice_line_ids
+                }
+            )
+
     def _compute_show_invoices(self):
         for target in self:
             target.show_invoices = (
@@ -139,67 +164,369 @@ class CommissionTarget(models.Model):
 
     def compute(self):
         self.check_extended_security_write()
-        self = self.sudo()
+        self.sudo()._compute()
 
-        for target in self._sorted_by_category_dependency():
-            target._update_base_amount()
-            target._update_total_amount()
+    def _compute(self):
+        invoices_per_target = self._get_invoices_per_target()
+
+        for targets in self._get_compute_plan():
+            for target in targets:
+                target._update_base_amount(invoices=invoices_per_target.get(target.id))
+            targets._update_total_amounts()
 
         self.last_compute_date = datetime.now()
 
+    def compute_incremental(self):
+        """Update the targets impacted by invoices changed since their last compute.
+
+        Targets that were never computed are fully computed.
+        """
+        self.check_extended_security_write()
+        self.sudo()._compute_incremental()
+
+    @api.model
+    def _cron_compute_incremental(self):
+        targets = self.search([("state", "=", "confirmed")])
+        targets.sudo()._compute_incremental()
+
+    def _compute_incremental(self):
+        """Incrementally compute the targets.
+
+        Only the invoice lines of invoices changed since the last compute
+        of a target are updated.
+        Then, the parent team targets of the updated targets are recomputed.
+
+        :return: the targets that were recomputed.
+        """
+        compute_date = datetime.now()
+
+        never_computed = self.filtered(lambda t: not t.last_compute_date)
+        never_computed._compute()
+
+        updated = (self - never_computed)._update_changed_invoice_lines()
+        parents = (updated | never_computed)._get_parent_team_targets()
+
+        for target in (updated | parents)._sorted_by_category_dependency():
+            if target.category_id.basis == "my_team_commissions":
+                target._update_base_amount()
+            target._update_total_amount()
+
+        (self | parents).write({"last_compute_date": compute_date})
+        return never_computed | updated | parents
+
+    def _update_changed_invoice_lines(self):
+        targets = self.filtered(lambda t: t.category_id.basis == "my_sales")
+        changed_invoices = targets._search_changed_invoices()
+        invoice_ids_per_user = _group_invoice_ids_per_user(changed_invoices)
+
+        updated = self.browse()
+        for target in targets:
+            invoices = target._filter_changed_invoices(
+                changed_invoices, invoice_ids_per_user
+            )
+            if invoices:
+                target._update_invoice_lines_incremental(invoices)
+                updated |= target
+
+        return updated
+
+    def _search_changed_invoices(self):
+        if not self:
+            return self.env["account.invoice"]
+
+        min_compute_date = min(self.mapped("last_compute_date"))
+        min_update_date = min_compute_date - COMMISSION_UPDATE_MARGIN
+        return self.env["account.invoice"].search(
+            [("commission_update_date", ">=", min_update_date)]
+        )
+
+    def _filter_changed_invoices(self, invoices, invoice_ids_per_user):
+        """Filter the changed invoices that may impact the target.
+
+        These are the invoices of the employee, as well as the invoices
+        already included in the target (i.e. if the salesperson was changed).
+
+        Invoices changed shortly before the last compute are included again,
+        because their transaction may have been committed after it.
+
+        :param invoices: the invoices changed since the oldest compute
+        :param invoice_ids_per_user: the ids of these invoices grouped by user id
+        """
+        user = self.employee_id.user_id
+        current_invoices = self.ledger_line_ids.mapped("invoice_line_id.invoice_id")
+        candidates = invoices.browse(invoice_ids_per_user.get(user.id, [])) | (
+            current_invoices & invoices
+        )
+        min_update_date = self.last_compute_date - COMMISSION_UPDATE_MARGIN
+        return candidates.filtered(
+            lambda inv: inv.commission_update_date >= min_update_date
+        )
+
+    def _update_invoice_lines_incremental(self, changed_invoices):
+        admissible_invoices = changed_invoices.search(
+            AND([[("id", "in", changed_invoices.ids)], self._get_invoice_domain()])
+        )
+        entries = self._get_ledger_entries(admissible_invoices)
+        self._update_ledger(entries, invoices=changed_invoices)
+        self.invoiced_amount = self._compute_invoiced_amount()
+        self.base_amount = self.invoiced_amount
+
+    def _get_parent_team_targets(self):
+        parents = self.browse()
+        children = self
+
+        while children:
+            children = self.search(
+                [
+                    ("basis", "=", "my_team_commissions"),
+                    ("state", "=", "confirmed"),
+                    ("date_range_id", "in", children.mapped("date_range_id").ids),
+                    (
+                        "category_id.child_category_ids",
+                        "in",
+                        children.mapped("category_id").ids,
+                    ),
+                ]
+            ) - parents - self
+            parents |= children
+
+        return parents
+
     def _sorted_by_category_dependency(self):
-        categories = list(self.mapped("category_id")._sorted_by_dependencies())
-        return self.sorted(lambda t: categories.index(t.category_id))
+        plan = self._get_compute_plan()
+        return self.browse([t.id for targets in plan for t in targets])
+
+    def _get_compute_plan(self):
+        """Get the order in which the targets must be computed.
+
+        Targets are grouped by dependency level of their category.
+        The targets of a level only depend on targets of lower levels.
+
+        :return: a list of recordsets of targets, ordered by level.
+        """
+        categories = self.mapped("category_id")
+        level_per_category = categories._get_dependency_level_per_category()
 
-    def _update_base_amount(self):
+        target_ids_per_level = defaultdict(list)
+        for target in self:
+            level = level_per_category[target.category_id.id]
+            target_ids_per_level[level].append(target.id)
+
+        return [
+            self.browse(target_ids_per_level[level])
+            for level in sorted(target_ids_per_level)
+        ]
+
+    def get_compute_plan(self):
+        """Get a readable version of the compute plan of the targets.
+
+        :return: a list of dictionaries containing the step
+            and the names of the targets to compute at this step.
+        """
+        return [
+            {"step": step, "targets": targets.mapped("display_name")}
+            for step, targets in enumerate(self._get_compute_plan())
+        ]
+
+    def _update_base_amount(self, invoices=None):
         if self.category_id.basis == "my_sales":
-            self._update_base_amount_my_sales()
+            self._update_base_amount_my_sales(invoices=invoices)
         elif self.category_id.basis == "my_team_commissions":
             self._update_base_amount_my_team_commissions()
 
-    def _update_base_amount_my_sales(self):
-        self.invoice_line_ids = self._get_invoice_lines()
+    def _update_base_amount_my_sales(self, invoices=None):
+        if invoices is None:
+            invoices = self._get_invoices()
+
+        self._update_ledger(self._get_ledger_entries(invoices))
         self.invoiced_amount = self._compute_invoiced_amount()
         self.base_amount = self.invoiced_amount
 
-    def _get_invoice_lines(self):
-        invoices = self._get_invoices()
-        return invoices.mapped("invoice_line_ids").filtered(
-            lambda l: self._should_use_invoice_line(l)
+    def _get_ledger_entries(self, invoices):
+        """Get the expected ledger entries for the given invoices.
+
+        :return: a dictionary mapping invoice line ids to a tuple (reason, amount)
+        """
+        included_line_ids = set(self._get_invoice_lines(invoices=invoices).ids)
+        entries = {}
+
+        for line in invoices.mapped("invoice_line_ids"):
+            if line.id in included_line_ids:
+                reason = "included"
+            elif self._is_excluded_invoice_line(line):
+                reason = "excluded_tag"
+            else:
+                reason = "missing_included_tag"
+
+            entries[line.id] = (reason, line.price_subtotal_signed)
+
+        return entries
+
+    def _update_ledger(self, entries, invoices=None):
+        """Update the ledger of the target with the given entries.
+
+        The ledger is diffed with the entries instead of being replaced.
+        Ledger lines that do not match an entry are deleted,
+        then the missing entries are created in a single call.
+
+        :param entries: a dictionary mapping invoice line ids to (reason, amount)
+        :param invoices: if given, only the ledger lines of these invoices
+            are updated. Otherwise, the whole ledger is updated.
+        """
+        ledger = self.ledger_line_ids
+        if invoices is not None:
+            invoice_ids = set(invoices.ids)
+            ledger = ledger.filtered(
+                lambda l: l.invoice_line_id.invoice_id.id in invoice_ids
+            )
+
+        existing = {l.invoice_line_id.id: l for l in ledger}
+        obsolete = ledger.filtered(
+            lambda l: entries.get(l.invoice_line_id.id) != (l.reason, l.amount)
         )
+        obsolete_line_ids = set(obsolete.mapped("invoice_line_id").ids)
+
+        vals_list = [
+            {
+                "target_id": self.id,
+                "invoice_line_id": line_id,
+                "reason": reason,
+                "amount": amount,
+            }
+            for line_id, (reason, amount) in entries.items()
+            if line_id not in existing or line_id in obsolete_line_ids
+        ]
+
+        obsolete.unlink()
+        if vals_list:
+            self.env["commission.target.line"].create(vals_list)
+
+        self.invalidate_cache(["ledger_line_ids"], self.ids)
+
+    def _get_invoice_lines(self, invoices=None):
+        if invoices is None:
+            invoices = self._get_invoices()
+
+        domain = AND(
+            [[("invoice_id", "in", invoices.ids)], self._get_invoice_line_tag_domain()]
+        )
+        return self.env["account.invoice.line"].search(domain)
+
+    def _get_invoice_line_tag_domain(self):
+        """Get the domain filtering invoice lines on included and excluded tags.
+
+        The domain is evaluated against the commission tags stored on
+        invoice lines. It can be extended by other modules
+        to filter the invoice lines included in the target.
+        """
+        domain = []
+
+        included = self.category_id.included_tag_ids
+        if included:
+            domain.append(("commission_tag_ids", "in", included.ids))
+
+        excluded = self.category_id.excluded_tag_ids
+        if excluded:
+            domain.append(("commission_tag_ids", "not in", excluded.ids))
+
+        return domain
 
     def _get_invoices(self):
-        invoices = self.env["account.invoice"].search(
+        return self.env["account.invoice"].search(self._get_invoice_domain())
+
+    def _get_invoice_domain(self):
+        domain = AND(
             [
-                ("date_invoice", ">=", self.date_start),
+                [("user_id", "=", self.employee_id.user_id.id)],
+                self._get_invoice_period_domain(self.date_start, self.date_end),
+                self._get_admissible_invoice_domain(),
             ]
         )
-        invoices = invoices.filtered(
-            lambda inv: inv.user_id == self.employee_id.user_id
-            and inv.date_invoice <= self.date_end
-            and inv.type not in ("in_invoice", "in_refund")
-            and inv.state not in ("draft", "cancel")
+
+        if self.category_id.filter_by_company:
+            domain = AND([domain, [("company_id", "=", self.company_id.id)]])
+
+        return domain
+
+    @api.model
+    def _get_invoice_period_domain(self, date_start, date_end):
+        return [
+            ("date_invoice", ">=", date_start),
+            ("date_invoice", "<=", date_end),
+        ]
+
+    @api.model
+    def _get_admissible_invoice_domain(self):
+        """Get the domain filtering invoices admissible for commissions.
+
+        This domain does not depend on the target.
+        It can be extended by other modules to exclude other types of invoices.
+        """
+        return [
+            ("type", "not in", ("in_invoice", "in_refund")),
+            ("state", "not in", ("draft", "cancel")),
+        ]
+
+    def _get_invoices_per_target(self):
+        """Get the admissible invoices of multiple targets at once.
+
+        Targets based on sales are grouped by date range, so that the invoices
+        of every salesperson of a given period are fetched with a single query.
+
+        The result is a dictionary mapping each target id to its invoices.
+        For a given target, these invoices are the same as the ones
+        returned by _get_invoices.
+        """
+        target_ids_per_period = defaultdict(list)
+        for target in self.filtered(lambda t: t.category_id.basis == "my_sales"):
+            target_ids_per_period[(target.date_start, target.date_end)].append(
+                target.id
+            )
+
+        result = {}
+        for (date_start, date_end), target_ids in target_ids_per_period.items():
+            targets = self.browse(target_ids)
+            invoices = targets._search_period_invoices(date_start, date_end)
+            invoice_ids_per_user = _group_invoice_ids_per_user(invoices)
+            for target in targets:
+                user_id = target.employee_id.user_id.id
+                invoice_ids = invoice_ids_per_user.get(user_id, [])
+                result[target.id] = target._filter_invoices_by_company(
+                    invoices.browse(invoice_ids)
+                )
+
+        return result
+
+    def _search_period_invoices(self, date_start, date_end):
+        users = self.mapped("employee_id.user_id")
+        user_domain = [("user_id", "in", users.ids)]
+
+        if any(not t.employee_id.user_id for t in self):
+            user_domain = OR([user_domain, [("user_id", "=", False)]])
+
+        domain = AND(
+            [
+                user_domain,
+                self._get_invoice_period_domain(date_start, date_end),
+                self._get_admissible_invoice_domain(),
+            ]
         )
+        return self.env["account.invoice"].search(domain)
 
+    def _filter_invoices_by_company(self, invoices):
         if self.category_id.filter_by_company:
             invoices = invoices.filtered(
                 lambda inv: inv.company_id == self.company_id
             )
-
         return invoices
 
     def _compute_invoiced_amount(self):
-        return sum(line.price_subtotal_signed for line in self.invoice_line_ids)
-
-    def _should_use_invoice_line(self, line):
-        is_included_line = self._is_included_invoice_line(line)
-        is_excluded_line = self._is_excluded_invoice_line(line)
-        return is_included_line and not is_excluded_line
-
-    def _is_included_invoice_line(self, line):
-        included = self.category_id.included_tag_ids
-        tags = self._get_related_sale_order_tags(line)
-        return not included or bool(included & tags)
+        groups = self.env["commission.target.line"].read_group(
+            [("target_id", "=", self.id), ("reason", "=", "included")],
+            ["amount"],
+            [],
+        )
+        return (groups[0]["amount"] or 0) if groups else 0
 
     def _is_excluded_invoice_line(self, line):
         excluded = self.category_id.excluded_tag_ids
@@ -207,10 +534,10 @@ class CommissionTarget(models.Model):
         return bool(excluded & tags)
 
     def _get_related_sale_order_tags(self, invoice_line):
-        return self._get_related_sale_order(invoice_line).so_tag_ids
+        return invoice_line.commission_tag_ids
 
     def _get_related_sale_order(self, invoice_line):
-        return invoice_line.mapped("sale_line_ids.order_id")[:1]
+        return invoice_line._get_commission_sale_orders()
 
     def _update_base_amount_my_team_commissions(self):
         self.child_target_ids = self._get_child_targets()
@@ -239,6 +566,22 @@ class CommissionTarget(models.Model):
     def _compute_child_commission_amount(self):
         return sum(child.total_amount for child in self.child_target_ids)
 
+    def _update_total_amounts(self):
+        """Update the total amount of multiple targets.
+
+        The rates of all interval targets are evaluated together.
+        """
+        interval_targets = self.filtered(
+            lambda t: t.category_id.rate_type == "interval"
+        )
+        interval_targets.mapped("rate_ids")._update_rates()
+
+        for target in self:
+            if target.category_id.rate_type == "fixed":
+                target._update_total_amount_fixed()
+            elif target.category_id.rate_type == "interval":
+                target.total_amount = target._compute_total_amount_interval()
+
     def _update_total_amount(self):
         if self.category_id.rate_type == "fixed":
             self._update_total_amount_fixed()
@@ -257,13 +600,95 @@ class CommissionTarget(models.Model):
         self.total_amount = self._compute_total_amount_interval()
 
     def _update_rates(self):
-        for rate in self.rate_ids:
-            rate._update_rate()
+        self.rate_ids._update_rates()
 
     def _compute_total_amount_interval(self):
         total = sum(rate.subtotal for rate in self.rate_ids)
         return total
 
+    def simulate(self, fixed_rate=None, slices=None):
+        """Simulate the commissions of the targets with alternative rates.
+
+        Nothing is written in the database.
+        The base amounts of the last compute of the targets are used.
+        The variations of commissions are propagated to the parent team targets.
+
+        :param fixed_rate: the rate to simulate for targets with a fixed rate
+        :param slices: the slices to simulate for targets with an interval rate,
+            as a list of dicts with slice_from, slice_to and commission_percentage
+        :return: a list of dicts, one per simulated target
+        """
+        self.check_extended_security_read()
+        parent_ids = self.sudo()._get_parent_team_targets().ids
+        parents = self.search([("id", "in", parent_ids)])
+        rates_per_target = dict.fromkeys(self.ids, (fixed_rate, slices))
+        return (self | parents).sudo()._simulate(rates_per_target)
+
+    def _simulate(self, rates_per_target):
+        """Simulate the commissions of the targets in memory.
+
+        :param rates_per_target: a dict mapping target ids to a tuple
+            (fixed_rate, slices). Targets missing from the dict keep their rates.
+        :return: a list of dicts, one per target, ordered by dependency level
+        """
+        total_per_target = {}
+        rows = []
+
+        for targets in self._get_compute_plan():
+            for target in targets:
+                fixed_rate, slices = rates_per_target.get(target.id, (None, None))
+                base_amount = target._simulate_base_amount(total_per_target)
+                total = target._simulate_total_amount(base_amount, fixed_rate, slices)
+                total_per_target[target.id] = total
+                rows.append(target._get_simulation_row(base_amount, total))
+
+        return rows
+
+    def _simulate_base_amount(self, total_per_target):
+        if self.category_id.basis != "my_team_commissions":
+            return self.base_amount
+
+        return self.base_amount + sum(
+            total_per_target[child.id] - child.total_amount
+            for child in self.child_target_ids
+            if child.id in total_per_target
+        )
+
+    def _simulate_total_amount(self, base_amount, fixed_rate=None, slices=None):
+        if self.category_id.rate_type == "fixed":
+            rate = self.fixed_rate if fixed_rate is None else fixed_rate
+            return base_amount * rate
+
+        if slices is None:
+            bounds = [
+                (r.slice_from, r.slice_to, r.commission_percentage)
+                for r in self.rate_ids
+            ]
+        else:
+            bounds = [
+                (s["slice_from"], s["slice_to"], s["commission_percentage"])
+                for s in slices
+            ]
+
+        values = evaluate_slices(
+            (slice_from, slice_to, percentage, self.target_amount, base_amount)
+            for slice_from, slice_to, percentage in bounds
+        )
+        return sum(subtotal for _completion_rate, subtotal in values)
+
+    def _get_simulation_row(self, base_amount, total_amount):
+        return {
+            "target_id": self.id,
+            "name": self.display_name,
+            "employee": self.employee_id.name,
+            "category": self.category_id.display_name,
+            "base_amount": self.base_amount,
+            "simulated_base_amount": base_amount,
+            "total_amount": self.total_amount,
+            "simulated_total_amount": total_amount,
+            "difference": total_amount - self.total_amount,
+        }
+
     @api.model
     def create(self, vals):
         target = super().create(vals)
@@ -404,20 +829,8 @@ class CommissionTarget(models.Model):
                 )
 
     def _get_user_managed_teams(self):
-        all_teams = self.env["crm.team"].sudo().search([])
-        user = self.env.user
-        return all_teams.filtered(lambda team: self._is_user_managed_team(user, team))
-
-    def _is_user_managed_team(self, user, team, depth=10):
-        if depth == 0:
-            return False
-
-        if team.user_id == user:
-            return True
-
-        parent_team = team.user_id.sale_team_id
-        if parent_team:
-            return self._is_user_managed_team(user, parent_team, depth=depth - 1)
+        teams = self.env["crm.team"].sudo()
+        return teams.browse(teams._get_commission_managed_team_ids(self.env.user.id))
 
     def get_extended_security_domain(self):
         result = super().get_extended_security_domain()
@@ -462,3 +875,10 @@ class CommissionTarget(models.Model):
         res.append("view_invoice_lines")
         res.append("view_child_targets")
         return res
+
+
+def _group_invoice_ids_per_user(invoices):
+    invoice_ids_per_user = defaultdict(list)
+    for invoice in invoices:
+        invoice_ids_per_user[invoice.user_id.id].append(invoice.id)
+    return invoice_ids_per_user
@@ -0,0 +1,64 @@
+# © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import fields, models
+from odoo.osv.expression import AND, is_leaf
+
+
+class CommissionTargetLine(models.Model):
+    """A line of the commission ledger of a target.
+
+    The ledger contains one line per invoice line of the admissible invoices
+    of a target, with the reason why the invoice line is included or excluded.
+
+    Ledger lines are not modified in place.
+    When the amount or the reason of an invoice line changes,
+    its ledger line is deleted and a new line is created.
+
+    The ledger lines follow the extended security of their target.
+    """
+
+    _name = "commission.target.line"
+    _description = "Commission Target Ledger Line"
+    _order = "id"
+
+    target_id = fields.Many2one(
+        "commission.target", required=True, index=True, ondelete="cascade"
+    )
+    invoice_line_id = fields.Many2one(
+        "account.invoice.line", required=True, index=True, ondelete="cascade"
+    )
+    amount = fields.Monetary()
+    reason = fields.Selection(
+        [
+            ("included", "Included"),
+            ("excluded_tag", "Excluded Tag"),
+            ("missing_included_tag", "No Included Tag"),
+        ],
+        required=True,
+    )
+    company_id = fields.Many2one("res.company", related="target_id.company_id")
+    currency_id = fields.Many2one("res.currency", related="company_id.currency_id")
+
+    _sql_constraints = [
+        (
+            "target_invoice_line_unique",
+            "unique (target_id, invoice_line_id)",
+            "An invoice line can only appear once in the ledger of a target.",
+        )
+    ]
+
+    def get_extended_security_domain(self):
+        result = super().get_extended_security_domain()
+        target_domain = self.env["commission.target"].get_extended_security_domain()
+        return AND([result, _prefix_domain(target_domain, "target_id")])
+
+
+def _prefix_domain(domain, field_name):
+    """Apply a domain of a related model through a many2one field."""
+    return [
+        ("{}.{}".format(field_name, leaf[0]),) + tuple(leaf[1:])
+        if is_leaf(leaf) and isinstance(leaf[0], str)
+        else leaf
+        for leaf in domain
+    ]
@@ -1,6 +1,7 @@
 # © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+from psycopg2.extras import execute_values
 from odoo import fields, models, api
 from odoo.exceptions import ValidationError
 
@@ -20,33 +21,54 @@ class CommissionTargetRate(models.Model):
     company_id = fields.Many2one("res.company", related="target_id.company_id")
     currency_id = fields.Many2one("res.currency", related="company_id.currency_id")
 
-    def _update_rate(self):
-        self.completion_rate = self._compute_completion_rate()
-        self.subtotal = self._compute_subtotal()
+    def _update_rates(self):
+        """Update the completion rate and subtotal of multiple rates at once.
 
-    def _compute_completion_rate(self):
-        total = self.target_id.base_amount
+        The values of all rates are evaluated in a single pass.
+        Then, the rates for which the values changed are updated
+        with a single query.
+        """
+        slices = [
+            (
+                rate.slice_from,
+                rate.slice_to,
+                rate.commission_percentage,
+                rate.target_id.target_amount,
+                rate.target_id.base_amount,
+            )
+            for rate in self
+        ]
 
-        slice_from, slice_to = self._get_absolute_slice_amounts()
-        if total <= slice_from:
-            return 0
+        values = []
+        for rate, (completion_rate, subtotal) in zip(self, evaluate_slices(slices)):
+            if rate.currency_id:
+                subtotal = rate.currency_id.round(subtotal)
+            if (rate.completion_rate, rate.subtotal) != (completion_rate, subtotal):
+                values.append((rate.id, completion_rate, subtotal))
 
-        elif total <= slice_to:
-            full_slice = slice_to - slice_from
-            completion = total - slice_from
-            return completion / full_slice * 100
+        if values:
+            self._write_rate_values(values)
 
-        else:
-            return 100
+    def _write_rate_values(self, values):
+        """Write the completion rate and subtotal of rates in a single query.
 
-    def _compute_subtotal(self):
-        slice_from, slice_to = self._get_absolute_slice_amounts()
-        return (
-            (slice_to - slice_from)
-            * self.completion_rate
-            / 100
-            * self.commission_percentage
+        :param values: a list of tuples (rate_id, completion_rate, subtotal)
+        """
+        execute_values(
+            self._cr,
+            """
+            UPDATE commission_target_rate AS rate
+            SET completion_rate = new.completion_rate,
+                subtotal = new.subtotal,
+                write_uid = {uid},
+                write_date = now() at time zone 'UTC'
+            FROM (VALUES %s) AS new (id, completion_rate, subtotal)
+            WHERE rate.id = new.id
+            """.format(uid=int(self._uid)),
+            values,
+            page_size=len(values),
         )
+        self.invalidate_cache(["completion_rate", "subtotal"], [v[0] for v in values])
 
     def _get_absolute_slice_amounts(self):
         target = self.target_id.target_amount
@@ -67,3 +89,38 @@ class CommissionTargetRate(models.Model):
                 raise ValidationError(
                     "The upper bound should be greater than the lower bound."
                 )
+
+
+def evaluate_slices(slices):
+    """Evaluate the completion rate and subtotal of commission slices.
+
+    :param slices: an iterable of tuples
+        (slice_from, slice_to, commission_percentage, target_amount, base_amount)
+    :return: a list of tuples (completion_rate, subtotal)
+    """
+    return [
+        evaluate_slice(slice_from, slice_to, percentage, target_amount, base_amount)
+        for slice_from, slice_to, percentage, target_amount, base_amount in slices
+    ]
+
+
+def evaluate_slice(slice_from, slice_to, percentage, target_amount, base_amount):
+    absolute_slice_from = slice_from * target_amount
+    absolute_slice_to = slice_to * target_amount
+
+    if base_amount <= absolute_slice_from:
+        completion_rate = 0
+    elif base_amount <= absolute_slice_to:
+        full_slice = absolute_slice_to - absolute_slice_from
+        completion = base_amount - absolute_slice_from
+        completion_rate = completion / full_slice * 100
+    else:
+        completion_rate = 100
+
+    subtotal = (
+        (absolute_slice_to - absolute_slice_from)
+        * completion_rate
+        / 100
+        * percentage
+    )
+    return completion_rate, subtotal
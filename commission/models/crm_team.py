@@ -0,0 +1,65 @@
+# © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import api, models, tools
+
+MAX_TEAM_HIERARCHY_DEPTH = 10
+
+
+class CrmTeam(models.Model):
+
+    _inherit = "crm.team"
+
+    @api.model
+    @tools.ormcache("user_id")
+    def _get_commission_managed_team_ids(self, user_id):
+        """Get the ids of the teams managed by a user, directly or indirectly.
+
+        A team is indirectly managed by a user if its manager is a member
+        of a team managed by this user, up to 10 levels of hierarchy.
+
+        The result is cached per user. The cache is cleared whenever the manager
+        of a team or the team of a user is changed.
+        """
+        all_teams = self.sudo().with_context(active_test=False).search([])
+        manager_per_team = {t.id: t.user_id.id for t in all_teams}
+        team_per_user = {u.id: u.sale_team_id.id for u in all_teams.mapped("user_id")}
+        return tuple(
+            team.id
+            for team in all_teams
+            if team.active
+            and _is_managed_team(team.id, user_id, manager_per_team, team_per_user)
+        )
+
+    @api.model
+    def create(self, vals):
+        team = super().create(vals)
+        self.clear_caches()
+        return team
+
+    @api.multi
+    def write(self, vals):
+        res = super().write(vals)
+        if "user_id" in vals or "active" in vals:
+            self.clear_caches()
+        return res
+
+    @api.multi
+    def unlink(self):
+        res = super().unlink()
+        self.clear_caches()
+        return res
+
+
+def _is_managed_team(team_id, user_id, manager_per_team, team_per_user):
+    for _depth in range(MAX_TEAM_HIERARCHY_DEPTH):
+        manager_id = manager_per_team.get(team_id)
+
+        if manager_id == user_id:
+            return True
+
+        team_id = team_per_user.get(manager_id)
+        if not team_id:
+            return False
+
+    return False
@@ -0,0 +1,16 @@
+# © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import api, models
+
+
+class ResUsers(models.Model):
+
+    _inherit = "res.users"
+
+    @api.multi
+    def write(self, vals):
+        res = super().write(vals)
+        if "sale_team_id" in vals:
+            self.env["crm.team"].clear_caches()
+        return res
@@ -0,0 +1,380 @@
+# © 2021 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+"""Benchmark of the compute of commission targets.
+
+The benchmark generates a configurable volume of invoices, sale orders,
+employees, teams and categories, then measures the wall time and the number
+of SQL queries of each phase of the compute.
+
+The data is generated with a fixed random seed, so that the reports
+of two runs on the same volumes can be compared.
+"""
+
+import os
+import random
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+
+class BenchmarkConfig:
+
+    defaults = {
+        "employees": 10,
+        "teams": 2,
+        "invoices_per_employee": 10,
+        "lines_per_invoice": 3,
+        "sale_orders": 20,
+        "tags": 5,
+        "category_levels": 2,
+        "rate_slices": 10,
+        "seed": 42,
+    }
+
+    def __init__(self, **kwargs):
+        for name, default in self.defaults.items():
+            setattr(self, name, kwargs.pop(name, default))
+
+        if kwargs:
+            raise TypeError("Unknown benchmark parameters: {}".format(list(kwargs)))
+
+    @classmethod
+    def from_environ(cls, prefix="COMMISSION_BENCHMARK_"):
+        """Build the config from environment variables.
+
+        For example, COMMISSION_BENCHMARK_EMPLOYEES=500 sets the number of employees.
+        """
+        values = {
+            name: int(os.environ[prefix + name.upper()])
+            for name in cls.defaults
+            if prefix + name.upper() in os.environ
+        }
+        return cls(**values)
+
+    def __str__(self):
+        return ", ".join(
+            "{}={}".format(name, getattr(self, name)) for name in self.defaults
+        )
+
+
+class CommissionDataGenerator:
+    """Generate synthetic data for benchmarking commission targets.
+
+    Invoices are set to the open state without generating journal entries,
+    which keeps the generation fast for large volumes.
+    """
+
+    date_start = date(2020, 1, 1)
+    date_end = date(2020, 3, 31)
+
+    def __init__(self, env, company, config):
+        self.env = env
+        self.company = company
+        self.config = config
+        self.random = random.Random(config.seed)
+
+    def generate(self):
+        """Generate the data and return the targets to compute."""
+        self.date_range = self._create_date_range()
+        self.account = self._get_income_account()
+        self.product = self.env["product.product"].create({"name": "Benchmark"})
+        self.customer = self.env["res.partner"].create({"name": "Benchmark"})
+        self.tags = self._create_tags()
+        self.sale_lines = self._create_sale_orders()
+        self.teams, self.managers = self._create_teams()
+        self.employees = self._create_employees()
+        self.categories = self._create_categories()
+        self._create_invoices()
+        return self._create_targets()
+
+    def _create_date_range(self):
+        date_range_type = self.env["date.range.type"].create({"name": "Benchmark"})
+        return self.env["date.range"].create(
+            {
+                "name": "Benchmark",
+                "date_start": self.date_start,
+                "date_end": self.date_end,
+                "type_id": date_range_type.id,
+            }
+        )
+
+    def _get_income_account(self):
+        return self.env["account.account"].search(
+            [
+                ("company_id", "=", self.company.id),
+                ("internal_group", "=", "income"),
+            ],
+            limit=1,
+        )
+
+    def _create_tags(self):
+        return self.env["sale.order.tag"].create(
+            [{"name": "Benchmark {}".format(i)} for i in range(self.config.tags)]
+        )
+
+    def _create_sale_orders(self):
+        orders = self.env["sale.order"].create(
+            [
+                {
+                    "partner_id": self.customer.id,
+                    "company_id": self.company.id,
+                    "so_tag_ids": [(6, 0, self._pick_tags().ids)],
+                    "order_line": [
+                        (
+                            0,
+                            0,
+                            {
+                                "product_id": self.product.id,
+                                "product_uom": self.product.uom_id.id,
+                                "product_uom_qty": 1,
+                                "name": "Benchmark",
+                            },
+                        )
+                    ],
+                }
+                for _ in range(self.config.sale_orders)
+            ]
+        )
+        return orders.mapped("order_line")
+
+    def _pick_tags(self):
+        count = self.random.randint(0, min(2, len(self.tags)))
+        return self.tags.browse(self.random.sample(self.tags.ids, count))
+
+    def _create_teams(self):
+        teams = self.env["crm.team"]
+        managers = self.env["res.users"]
+
+        for i in range(self.config.teams):
+            manager = self._create_user("Benchmark Manager {}".format(i))
+            teams |= self.env["crm.team"].create(
+                {"name": "Benchmark {}".format(i), "user_id": manager.id}
+            )
+            managers |= manager
+
+        return teams, managers
+
+    def _create_employees(self):
+        employees = self.env["hr.employee"]
+
+        for i in range(self.config.employees):
+            user = self._create_user("Benchmark Employee {}".format(i))
+            user.sale_team_id = self.teams[i % len(self.teams)]
+            employees |= self._create_employee(user)
+
+        return employees
+
+    def _create_user(self, name):
+        return self.env["res.users"].create(
+            {
+                "name": name,
+                "login": name,
+                "company_ids": [(4, self.company.id)],
+                "company_id": self.company.id,
+            }
+        )
+
+    def _create_employee(self, user):
+        return self.env["hr.employee"].create({"name": user.name, "user_id": user.id})
+
+    def _create_categories(self):
+        """Create one list of categories per level.
+
+        The first level contains a fixed and an interval category based on sales,
+        each with included and excluded tags.
+        Each next level contains a category based on the previous level.
+        """
+        included_tag = self.tags[:1]
+        excluded_tag = self.tags[1:2]
+        fixed = self._create_category("Sales Fixed", "my_sales", "fixed")
+        interval = self._create_category("Sales Interval", "my_sales", "interval")
+        (fixed | interval).write(
+            {
+                "included_tag_ids": [(6, 0, included_tag.ids)],
+                "excluded_tag_ids": [(6, 0, excluded_tag.ids)],
+            }
+        )
+        categories = [fixed | interval]
+
+        for level in range(1, self.config.category_levels):
+            category = self._create_category(
+                "Team Level {}".format(level), "my_team_commissions", "interval"
+            )
+            category.child_category_ids = categories[-1]
+            categories.append(category)
+
+        return categories
+
+    def _create_category(self, name, basis, rate_type):
+        return self.env["commission.category"].create(
+            {
+                "name": "Benchmark {}".format(name),
+                "basis": basis,
+                "rate_type": rate_type,
+                "fixed_rate": 0.05,
+            }
+        )
+
+    def _create_invoices(self):
+        invoices = self.env["account.invoice"].create(
+            [
+                self._get_invoice_vals(employee.user_id)
+                for employee in self.employees
+                for _ in range(self.config.invoices_per_employee)
+            ]
+        )
+        invoices.write({"state": "open"})
+
+    def _get_invoice_vals(self, user):
+        return {
+            "company_id": self.company.id,
+            "partner_id": self.customer.id,
+            "user_id": user.id,
+            "date_invoice": self._pick_date(),
+            "invoice_line_ids": [
+                (0, 0, self._get_invoice_line_vals())
+                for _ in range(self.config.lines_per_invoice)
+            ],
+        }
+
+    def _pick_date(self):
+        days = (self.date_end - self.date_start).days
+        return self.date_start + timedelta(days=self.random.randint(0, days))
+
+    def _get_invoice_line_vals(self):
+        sale_line = self.random.choice(self.sale_lines)
+        return {
+            "name": "Benchmark",
+            "product_id": self.product.id,
+            "account_id": self.account.id,
+            "quantity": 1,
+            "price_unit": self.random.randint(100, 10000),
+            "sale_line_ids": [(6, 0, sale_line.ids)],
+        }
+
+    def _create_targets(self):
+        targets = self.env["commission.target"]
+
+        for category in self.categories[0]:
+            for employee in self.employees:
+                targets |= self._create_target(employee, category)
+
+        if len(self.categories) > 1:
+            for manager, team in zip(self.managers, self.teams):
+                employee = self._create_employee(manager)
+                targets |= self._create_target(employee, self.categories[1], team)
+
+        previous_managers = self.managers
+        for level, category in enumerate(self.categories[2:], 2):
+            director = self._create_user("Benchmark Director {}".format(level))
+            team = self.env["crm.team"].create(
+                {"name": "Benchmark Level {}".format(level), "user_id": director.id}
+            )
+            previous_managers.write({"sale_team_id": team.id})
+            employee = self._create_employee(director)
+            targets |= self._create_target(employee, category, team)
+            previous_managers = director
+
+        return targets
+
+    def _create_target(self, employee, category, teams=None):
+        teams = teams or self.env["crm.team"]
+        target = self.env["commission.target"].create(
+            {
+                "employee_id": employee.id,
+                "category_id": category.id,
+                "company_id": self.company.id,
+                "date_range_id": self.date_range.id,
+                "target_amount": 100000,
+                "fixed_rate": 0.05,
+                "included_teams_ids": [(6, 0, teams.ids)],
+                "rate_ids": [(0, 0, vals) for vals in self._get_rate_vals()],
+            }
+        )
+        target.state = "confirmed"
+        return target
+
+    def _get_rate_vals(self):
+        slices = self.config.rate_slices
+        return [
+            {
+                "slice_from": i / slices,
+                "slice_to": (i + 1) / slices,
+                "commission_percentage": 0.01 * (i + 1),
+            }
+            for i in range(slices)
+        ]
+
+
+class CommissionBenchmark:
+    """Measure each phase of the compute of commission targets.
+
+    The phases are run in the same order as in a standard compute.
+    The cache is invalidated before each phase, so that each phase
+    is measured with a cold cache.
+    """
+
+    def __init__(self, targets):
+        self.targets = targets.sudo()
+        self.env = self.targets.env
+        self.results = []
+
+    def run(self):
+        targets = self.targets
+        sales_targets = targets.filtered(lambda t: t.basis == "my_sales")
+
+        with self._measure("invoice selection"):
+            invoices_per_target = sales_targets._get_invoices_per_target()
+
+        with self._measure("tag filtering"):
+            for target in sales_targets:
+                target._update_base_amount(
+                    invoices=invoices_per_target.get(target.id)
+                )
+
+        with self._measure("rate evaluation"):
+            sales_targets._update_total_amounts()
+
+        with self._measure("team rollup"):
+            for level in targets._get_compute_plan():
+                team_targets = level.filtered(
+                    lambda t: t.basis == "my_team_commissions"
+                )
+                for target in team_targets:
+                    target._update_base_amount()
+                team_targets._update_total_amounts()
+
+        with self._measure("full compute"):
+            targets._compute()
+
+        return self.results
+
+    @contextmanager
+    def _measure(self, phase):
+        self.env.invalidate_all()
+        cr = self.env.cr
+        query_count = cr.sql_log_count
+        start = time.perf_counter()
+        yield
+        self.targets.recompute()
+        self.results.append(
+            {
+                "phase": phase,
+                "queries": cr.sql_log_count - query_count,
+                "seconds": time.perf_counter() - start,
+            }
+        )
+
+
+def format_benchmark_report(config, results):
+    lines = [
+        "Commission compute benchmark",
+        str(config),
+        "{:<20}{:>10}{:>12}".format("Phase", "Queries", "Seconds"),
+    ]
+    lines.extend(
+        "{:<20}{:>10}{:>12.3f}".format(r["phase"], r["queries"], r["seconds"])
+        for r in results
+    )
+    return "\n".join(lines)
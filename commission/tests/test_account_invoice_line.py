@@ -26,3 +26,46 @@ class TestAccountInvoiceLine(CommissionCase):
         self.target.set_draft_state()
         invoice_line = self.invoice.invoice_line_ids
         assert invoice_line.commission_target_count == 0
+
+
+class TestAccountInvoiceLineCommissionTags(CommissionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.invoice = cls._create_invoice(amount=1)
+        cls.invoice_line = cls.invoice.invoice_line_ids
+
+        cls.product = cls.env["product.product"].create({"name": "Product"})
+        cls.order = cls.env["sale.order"].create(
+            {
+                "partner_id": cls.customer.id,
+                "pricelist_id": cls.env.ref("product.list0").id,
+            }
+        )
+        cls.order_line = cls.env["sale.order.line"].create(
+            {
+                "product_id": cls.product.id,
+                "order_id": cls.order.id,
+                "product_uom": cls.product.uom_id.id,
+                "product_uom_qty": 1,
+                "name": "line",
+            }
+        )
+        cls.tag = cls.env["sale.order.tag"].create({"name": "Chairs"})
+
+    def test_no_sale_order(self):
+        self.order.so_tag_ids = self.tag
+        assert not self.invoice_line.commission_tag_ids
+
+    def test_sale_order_tags(self):
+        self.order.so_tag_ids = self.tag
+        self.order_line.invoice_lines = self.invoice_line
+        assert self.invoice_line.commission_tag_ids == self.tag
+
+    def test_tags_updated_on_sale_order(self):
+        self.order_line.invoice_lines = self.invoice_line
+        self.order.so_tag_ids = self.tag
+        assert self.invoice_line.commission_tag_ids == self.tag
+
+        self.order.so_tag_ids = False
+        assert not self.invoice_line.commission_tag_ids
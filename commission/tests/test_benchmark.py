@@ -0,0 +1,61 @@
+# © 2021 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+import logging
+from .benchmark import (
+    BenchmarkConfig,
+    CommissionBenchmark,
+    CommissionDataGenerator,
+    format_benchmark_report,
+)
+from .common import CommissionCase
+
+_logger = logging.getLogger(__name__)
+
+
+class TestBenchmark(CommissionCase):
+    """Run the commission benchmark.
+
+    By default, the benchmark runs on small volumes, so that it can be
+    executed with the other tests. Bigger volumes can be configured with
+    environment variables, for example:
+
+        COMMISSION_BENCHMARK_EMPLOYEES=500 pytest commission/tests/test_benchmark.py
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config = BenchmarkConfig.from_environ()
+        generator = CommissionDataGenerator(cls.env, cls.company, cls.config)
+        cls.targets = generator.generate()
+
+    def test_benchmark(self):
+        results = CommissionBenchmark(self.targets).run()
+        _logger.info(format_benchmark_report(self.config, results))
+
+        assert [r["phase"] for r in results] == [
+            "invoice selection",
+            "tag filtering",
+            "rate evaluation",
+            "team rollup",
+            "full compute",
+        ]
+
+    def test_generated_targets(self):
+        levels = self.targets._get_compute_plan()
+        assert len(levels) == self.config.category_levels
+
+    def test_same_amounts_as_single_target_compute(self):
+        CommissionBenchmark(self.targets).run()
+        sales_targets = self.targets.filtered(lambda t: t.basis == "my_sales")
+        amounts = sales_targets.mapped("base_amount")
+
+        for target in sales_targets:
+            target.sudo()._compute()
+
+        assert sales_targets.mapped("base_amount") == amounts
+
+    def test_config_from_environ(self):
+        config = BenchmarkConfig.from_environ(prefix="COMMISSION_BENCHMARK_UNSET_")
+        assert config.employees == BenchmarkConfig.defaults["employees"]
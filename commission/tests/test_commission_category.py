@@ -11,37 +11,35 @@ class TestCommissionCategory(CommissionCase):
     def setUpClass(cls):
         super().setUpClass()
 
-    def test_get_one_child(self):
-        child_category = self._create_category("Child")
-        self.category.child_category_ids = child_category
-        assert self.category._get_all_children() == child_category
-
-    def test_get_many_children(self):
+    def test_dependency_levels(self):
         first_child = self._create_category("Child")
         second_child = self._create_category("Child's Child")
-        self.category.child_category_ids = first_child
+        other_child = self._create_category("Other Child")
+        self.category.child_category_ids = first_child | other_child
         first_child.child_category_ids = second_child
 
-        children = self.category._get_all_children()
-
-        assert children[0] == first_child
-        assert children[1] == second_child
+        categories = self.category | first_child | second_child | other_child
+        levels = categories._get_dependency_levels()
 
-    def test_get_no_children(self):
-        assert not self.category._get_all_children()
+        assert levels == [second_child | other_child, first_child, self.category]
 
-    def test_sorted_by_dependencies(self):
+    def test_dependency_levels__child_not_in_recordset(self):
         first_child = self._create_category("Child")
         second_child = self._create_category("Child's Child")
         self.category.child_category_ids = first_child
         first_child.child_category_ids = second_child
 
-        categories = self.category | second_child | first_child
-        sorted_categories = categories._sorted_by_dependencies()
+        levels = (self.category | second_child)._get_dependency_levels()
 
-        assert sorted_categories[0] == second_child
-        assert sorted_categories[1] == first_child
-        assert sorted_categories[2] == self.category
+        assert levels == [second_child, self.category]
+
+    def test_circular_dependency(self):
+        first_child = self._create_category("Child")
+        second_child = self._create_category("Child's Child")
+        self.category.child_category_ids = first_child
+        first_child.child_category_ids = second_child
+        with pytest.raises(ValidationError):
+            second_child.child_category_ids = self.category
 
     def test_no_self_child(self):
         with pytest.raises(ValidationError):
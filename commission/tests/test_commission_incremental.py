@@ -0,0 +1,102 @@
+# © 2021 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from datetime import datetime, timedelta
+from .common import CommissionCase
+
+
+class TestCommissionIncremental(CommissionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.invoice = cls._create_invoice(amount=5000)
+        cls.target = cls._create_target(target_amount=100000, fixed_rate=0.1)
+        cls.target.set_confirmed_state()
+
+        cls.team_manager_user = cls._create_user(
+            name="TeamManager", email="team-manager@testmail.com"
+        )
+        cls.team_manager = cls._create_employee(user=cls.team_manager_user)
+        cls.team = cls._create_team("Sales U.S.", cls.team_manager_user)
+        cls.team.member_ids = cls.user
+
+        cls.team_category = cls._create_category(
+            name="Manager", basis="my_team_commissions"
+        )
+        cls.team_category.child_category_ids = cls.category
+        cls.manager_target = cls._create_target(
+            employee=cls.team_manager,
+            category=cls.team_category,
+            target_amount=40000,
+            fixed_rate=0.5,
+        )
+        cls.manager_target.included_teams_ids = cls.team
+        cls.manager_target.set_confirmed_state()
+
+    def test_never_computed_target(self):
+        self._compute_incremental()
+        assert self.target.base_amount == 5000
+        assert self.target.last_compute_date
+
+    def test_new_invoice(self):
+        self.target.compute()
+        new_invoice = self._create_invoice(amount=1000)
+        self._compute_incremental()
+        assert self.target.base_amount == 6000
+        assert new_invoice.invoice_line_ids in self.target.invoice_line_ids
+
+    def test_cancelled_invoice(self):
+        self.target.compute()
+        self.invoice.state = "cancel"
+        self._compute_incremental()
+        assert self.target.base_amount == 0
+        assert not self.target.invoice_line_ids
+
+    def test_invoice_of_other_user(self):
+        self.target.compute()
+        self.invoice.user_id = self.manager_user
+        self._compute_incremental()
+        assert self.target.base_amount == 0
+
+    def test_unchanged_target_not_recomputed(self):
+        self.target.compute()
+        self.invoice.commission_update_date = datetime.now() - timedelta(days=1)
+        self.target.base_amount = 1
+        self._compute_incremental()
+        assert self.target.base_amount == 1
+
+    def test_unchanged_target_compute_date_updated(self):
+        self.target.compute()
+        self.target.last_compute_date = datetime.now() - timedelta(days=1)
+        self.invoice.commission_update_date = datetime.now() - timedelta(days=2)
+        self._compute_incremental()
+        assert self.target.last_compute_date > datetime.now() - timedelta(hours=1)
+
+    def test_invoice_committed_after_compute_start(self):
+        self.target.compute()
+        new_invoice = self._create_invoice(amount=1000)
+        new_invoice.commission_update_date = datetime.now() - timedelta(minutes=1)
+        self.target.last_compute_date = datetime.now()
+        self._compute_incremental()
+        assert self.target.base_amount == 6000
+
+    def test_new_invoice_has_commission_update_date(self):
+        new_invoice = self._create_invoice(amount=1000)
+        assert new_invoice.commission_update_date
+
+    def test_parent_team_target_updated(self):
+        self.target.compute()
+        self.manager_target.compute()
+        self._create_invoice(amount=1000)
+        self._compute_incremental()
+        assert self.target.total_amount == 600
+        assert self.manager_target.total_amount == 300
+
+    def test_cron(self):
+        self.target.compute()
+        self._create_invoice(amount=1000)
+        self.env["commission.target"]._cron_compute_incremental()
+        assert self.target.base_amount == 6000
+
+    def _compute_incremental(self):
+        self.target.sudo(self.manager_user).compute_incremental()
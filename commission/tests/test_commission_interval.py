@@ -2,10 +2,15 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
 import pytest
+from psycopg2.extras import execute_values
+from unittest.mock import patch
 from .common import CommissionCase
+from ..models.commission_target_rate import evaluate_slices
 from ddt import ddt, data, unpack
 from odoo.exceptions import ValidationError
 
+EXECUTE_VALUES = "odoo.addons.commission.models.commission_target_rate.execute_values"
+
 
 @ddt
 class TestCommissionInterval(CommissionCase):
@@ -49,6 +54,43 @@ class TestCommissionInterval(CommissionCase):
         self.target.compute()
         assert rate.subtotal == subtotal
 
+    def test_evaluate_slices(self):
+        slices = [
+            (0, 0.5, 0.05, 100000, 60000),
+            (0.5, 1, 0.05, 100000, 60000),
+            (1, 2, 0.05, 100000, 60000),
+        ]
+        assert evaluate_slices(slices) == [(100, 2500), (20, 500), (0, 0)]
+
+    def test_rates_of_many_targets(self):
+        other_target = self._create_target(target_amount=200000)
+        rate = self._create_target_rate(self.target, 0.5, 1, self.interval_rate)
+        other_rate = self._create_target_rate(
+            other_target, 0.25, 0.5, self.interval_rate
+        )
+        self.category.rate_type = "interval"
+
+        (self.target | other_target).compute()
+
+        assert rate.completion_rate == 20
+        assert other_rate.completion_rate == 20
+        assert self.target.total_amount == 500
+        assert other_target.total_amount == 500
+
+    def test_rates_updated_in_single_query(self):
+        first_rate = self._create_target_rate(self.target, 0, 0.5, self.interval_rate)
+        second_rate = self._create_target_rate(self.target, 0.5, 1, self.interval_rate)
+        rates = first_rate | second_rate
+        self.target.base_amount = 60000
+
+        with patch(EXECUTE_VALUES, wraps=execute_values) as execute_values_mock:
+            rates._update_rates()
+            rates._update_rates()
+
+        assert execute_values_mock.call_count == 1
+        assert rates.mapped("completion_rate") == [100, 20]
+        assert rates.mapped("subtotal") == [2500, 500]
+
     def test_interval_date_invalid(self):
         with pytest.raises(ValidationError):
             self._create_target_rate(self.target, 0.5, 0.4)
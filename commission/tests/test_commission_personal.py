@@ -116,6 +116,61 @@ class TestCommissionPersonal(CommissionCase):
         invoices = self.target._get_invoices()
         assert not invoices
 
+    def test_invoices_per_target(self):
+        invoices = self.target._get_invoices_per_target()
+        assert invoices[self.target.id] == self.target._get_invoices()
+
+    def test_invoices_per_target__many_users(self):
+        other_user = self._create_user(name="Other", email="other@testmail.com")
+        other_employee = self._create_employee(user=other_user)
+        other_target = self._create_target(employee=other_employee)
+        other_invoice = self._create_invoice(user=other_user, amount=1000)
+
+        invoices = (self.target | other_target)._get_invoices_per_target()
+
+        assert invoices[self.target.id] == self.invoice
+        assert invoices[other_target.id] == other_invoice
+
+    def test_invoices_per_target__employee_without_user(self):
+        other_target = self._create_target(employee=self._create_employee())
+        other_invoice = self._create_invoice(amount=1000)
+        other_invoice.user_id = False
+
+        invoices = (self.target | other_target)._get_invoices_per_target()
+
+        assert invoices[self.target.id] == self.invoice
+        assert invoices[other_target.id] == other_invoice
+        assert invoices[other_target.id] == other_target._get_invoices()
+
+    def test_invoices_per_target__filter_by_company(self):
+        self.target.category_id.filter_by_company = True
+        self.target.company_id = self._create_company(name="Other Company")
+        invoices = self.target._get_invoices_per_target()
+        assert not invoices[self.target.id]
+
+    def test_invoices_per_target__many_periods(self):
+        other_date_range = self._create_date_range(
+            "Q3", date(2020, 8, 17), date(2020, 11, 17)
+        )
+        other_target = self._create_target(date_range=other_date_range)
+        other_invoice = self._create_invoice(_date=date(2020, 9, 1), amount=1000)
+
+        invoices = (self.target | other_target)._get_invoices_per_target()
+
+        assert invoices[self.target.id] == self.invoice
+        assert invoices[other_target.id] == other_invoice
+
+    def test_base_amount__many_targets(self):
+        other_user = self._create_user(name="Other", email="other@testmail.com")
+        other_employee = self._create_employee(user=other_user)
+        other_target = self._create_target(employee=other_employee)
+        self._create_invoice(user=other_user, amount=1000)
+
+        (self.target | other_target).sudo(self.manager_user).compute()
+
+        assert self.target.base_amount == 5000
+        assert other_target.base_amount == 1000
+
     def test_base_amount(self):
         self._compute_target()
         assert self.target.invoiced_amount == 5000
@@ -162,6 +217,43 @@ class TestCommissionPersonal(CommissionCase):
         self._compute_target()
         assert self.target.base_amount == 5000
 
+    def test_ledger__included_line(self):
+        self._compute_target()
+        ledger = self.target.ledger_line_ids
+        assert ledger.invoice_line_id == self.invoice.invoice_line_ids
+        assert ledger.reason == "included"
+        assert ledger.amount == 5000
+
+    def test_ledger__excluded_tag(self):
+        self.category.excluded_tag_ids = self.excluded_tag
+        self.sale_order.so_tag_ids = self.excluded_tag
+        self._compute_target()
+        assert self.target.ledger_line_ids.reason == "excluded_tag"
+        assert not self.target.invoice_line_ids
+
+    def test_ledger__missing_included_tag(self):
+        self.category.included_tag_ids = self.included_tag
+        self._compute_target()
+        assert self.target.ledger_line_ids.reason == "missing_included_tag"
+        assert not self.target.invoice_line_ids
+
+    def test_ledger__unchanged_lines_kept(self):
+        self._compute_target()
+        ledger = self.target.ledger_line_ids
+        self._create_invoice(amount=1000)
+        self._compute_target()
+        assert ledger in self.target.ledger_line_ids
+        assert len(self.target.ledger_line_ids) == 2
+
+    def test_ledger__reason_changed(self):
+        self._compute_target()
+        ledger = self.target.ledger_line_ids
+        self.category.excluded_tag_ids = self.excluded_tag
+        self.sale_order.so_tag_ids = self.excluded_tag
+        self._compute_target()
+        assert not ledger.exists()
+        assert self.target.ledger_line_ids.reason == "excluded_tag"
+
     def test_no_same_tags(self):
         self.category.included_tag_ids = self.included_tag
         with pytest.raises(ValidationError):
@@ -228,9 +320,24 @@ class TestCommissionPersonal(CommissionCase):
         targets = self._search_employee_targets()
         assert not targets
 
+    def test_ledger_access_domain(self):
+        self._compute_target()
+        ledger = self._search_employee_ledger_lines()
+        assert ledger == self.target.ledger_line_ids
+
+    def test_ledger_access_domain__target_of_other_employee(self):
+        self._compute_target()
+        self.target.employee_id = self.manager
+        assert not self._search_employee_ledger_lines()
+
     def _compute_target(self):
         self.target.sudo(self.manager_user).compute()
 
+    def _search_employee_ledger_lines(self):
+        ledger_model = self.env["commission.target.line"]
+        domain = ledger_model.sudo(self.user).get_extended_security_domain()
+        return ledger_model.search(domain)
+
     def _search_employee_targets(self):
         domain = (
             self.env["commission.target"].sudo(self.user).get_extended_security_domain()
@@ -0,0 +1,74 @@
+# © 2021 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
+
+from .common import CommissionCase
+
+
+class TestCommissionSimulation(CommissionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.target = cls._create_target(target_amount=100000, fixed_rate=0.05)
+        cls.target.write({"base_amount": 60000, "total_amount": 3000})
+
+        cls.team_category = cls._create_category(
+            "Manager", basis="my_team_commissions"
+        )
+        cls.team_category.child_category_ids = cls.category
+        cls.team_target = cls._create_target(
+            employee=cls.manager, category=cls.team_category, fixed_rate=0.1
+        )
+        cls.team_target.write(
+            {
+                "state": "confirmed",
+                "child_target_ids": [(6, 0, cls.target.ids)],
+                "base_amount": 3000,
+                "total_amount": 300,
+            }
+        )
+
+    def _get_row(self, rows, target):
+        return next(r for r in rows if r["target_id"] == target.id)
+
+    def test_simulate_fixed_rate(self):
+        rows = self.target.simulate(fixed_rate=0.1)
+        row = self._get_row(rows, self.target)
+        assert row["simulated_total_amount"] == 6000
+        assert row["total_amount"] == 3000
+        assert row["difference"] == 3000
+
+    def test_simulate_current_rates(self):
+        rows = self.target.simulate()
+        assert self._get_row(rows, self.target)["difference"] == 0
+
+    def test_simulate_slices(self):
+        self.category.rate_type = "interval"
+        slices = [
+            {"slice_from": 0, "slice_to": 0.5, "commission_percentage": 0.05},
+            {"slice_from": 0.5, "slice_to": 1, "commission_percentage": 0.1},
+        ]
+        rows = self.target.simulate(slices=slices)
+        row = self._get_row(rows, self.target)
+        assert row["simulated_total_amount"] == 2500 + 1000
+
+    def test_simulate_target_rates(self):
+        self.category.rate_type = "interval"
+        self._create_target_rate(self.target, 0, 1, 0.05)
+        rows = self.target.simulate()
+        assert self._get_row(rows, self.target)["simulated_total_amount"] == 3000
+
+    def test_simulation_propagated_to_parent_team_target(self):
+        self.target.state = "confirmed"
+        rows = self.target.simulate(fixed_rate=0.1)
+        row = self._get_row(rows, self.team_target)
+        assert row["simulated_base_amount"] == 6000
+        assert row["simulated_total_amount"] == 600
+
+    def test_simulation_does_not_write(self):
+        self.target.simulate(fixed_rate=0.1)
+        assert self.target.total_amount == 3000
+        assert self.target.fixed_rate == 0.05
+
+    def test_simulate_category(self):
+        rows = self.category.simulate(self.date_range.id, fixed_rate=0.1)
+        assert self._get_row(rows, self.target)["simulated_total_amount"] == 6000
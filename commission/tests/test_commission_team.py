@@ -170,6 +170,17 @@ class TestCommissionTeam(CommissionCase):
         assert rset[0] == self.employee_target
         assert rset[1] == self.manager_target
 
+    def test_compute_plan(self):
+        plan = (self.manager_target | self.employee_target)._get_compute_plan()
+        assert plan == [self.employee_target, self.manager_target]
+
+    def test_compute_plan__readable(self):
+        plan = (self.manager_target | self.employee_target).get_compute_plan()
+        assert plan == [
+            {"step": 0, "targets": [self.employee_target.display_name]},
+            {"step": 1, "targets": [self.manager_target.display_name]},
+        ]
+
     def test_no_child_categories(self):
         self.team_category.child_category_ids = None
         self.employee_target.total_amount = 400000 * 0.05
@@ -226,6 +237,22 @@ class TestCommissionTeam(CommissionCase):
         with pytest.raises(AccessError):
             self.employee_target.sudo(self.team_manager_user).check_extended_security_all()
 
+    def test_managed_teams(self):
+        teams = self.manager_target.sudo(self.president_user)._get_user_managed_teams()
+        assert teams == self.team | self.parent_team
+
+    def test_managed_teams__manager_changed(self):
+        target = self.manager_target.sudo(self.president_user)
+        target._get_user_managed_teams()
+        self.team.user_id = self.user
+        assert target._get_user_managed_teams() == self.parent_team
+
+    def test_managed_teams__member_changed(self):
+        target = self.manager_target.sudo(self.president_user)
+        target._get_user_managed_teams()
+        self.team_manager_user.sale_team_id = False
+        assert target._get_user_managed_teams() == self.parent_team
+
     def _compute_manager_target(self):
         self.manager_target.sudo(self.manager_user).compute()
 
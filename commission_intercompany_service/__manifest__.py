@@ -3,7 +3,7 @@
 
 {
     "name": "Commission Intercompany Service",
-    "version": "1.0.0",
+    "version": "1.1.0",
     "author": "Numigi",
     "maintainer": "Numigi",
     "website": "https://bit.ly/numigi-com",
@@ -0,0 +1,34 @@
+# © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import api, fields, models
+
+
+class AccountInvoiceLine(models.Model):
+
+    _inherit = "account.invoice.line"
+
+    commission_source_order_ids = fields.Many2many(
+        "sale.order",
+        "account_invoice_line_commission_source_order_rel",
+        "invoice_line_id",
+        "order_id",
+        "Commission Source Orders",
+        compute="_compute_commission_source_order_ids",
+        compute_sudo=True,
+        store=True,
+    )
+
+    @api.depends("sale_line_ids.order_id", "invoice_id.interco_service_order_id")
+    def _compute_commission_source_order_ids(self):
+        for line in self:
+            orders = super(AccountInvoiceLine, line)._get_commission_sale_orders()
+            interco_order = line.invoice_id.interco_service_order_id
+            line.commission_source_order_ids = orders | interco_order
+
+    @api.depends("commission_source_order_ids.so_tag_ids")
+    def _compute_commission_tag_ids(self):
+        super()._compute_commission_tag_ids()
+
+    def _get_commission_sale_orders(self):
+        return self.commission_source_order_ids
@@ -66,3 +66,31 @@ class TestCommissionTarget(CommissionCase):
 
     def _make_new_company(self):
         return self.env["res.company"].create({"name": "New Company"})
+
+    def test_commission_source_order(self):
+        self.order_line.invoice_lines = self.invoice_line
+        assert self.invoice_line.commission_source_order_ids == self.order
+
+    def test_commission_source_order_intercompany(self):
+        other_order = self.order.copy()
+        self.order_line.invoice_lines = self.invoice_line
+        self.invoice.interco_service_order_id = other_order
+        assert self.invoice_line.commission_source_order_ids == (
+            self.order | other_order
+        )
+
+    def test_commission_tags_from_intercompany_order(self):
+        tag = self.env["sale.order.tag"].create({"name": "Interco"})
+        self.order.so_tag_ids = tag
+        self.invoice.interco_service_order_id = self.order
+        assert self.invoice_line.commission_tag_ids == tag
+
+    def test_commission_tags_from_both_orders(self):
+        tag = self.env["sale.order.tag"].create({"name": "Direct"})
+        interco_tag = self.env["sale.order.tag"].create({"name": "Interco"})
+        other_order = self.order.copy()
+        self.order.so_tag_ids = tag
+        other_order.so_tag_ids = interco_tag
+        self.order_line.invoice_lines = self.invoice_line
+        self.invoice.interco_service_order_id = other_order
+        assert self.invoice_line.commission_tag_ids == tag | interco_tag
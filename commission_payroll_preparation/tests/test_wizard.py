@@ -107,6 +107,32 @@ class TestWizard(TestPayrollCase):
         with pytest.raises(ValidationError):
             self.wizard.confirm()
 
+    def test_create_payroll_many_targets(self):
+        self._create_invoice(amount=500)
+        other_target = self.target.copy({"state": "confirmed"})
+        targets = self.target | other_target
+        targets.compute()
+        self.wizard.target_ids = targets
+
+        self.wizard.confirm()
+
+        assert self.target.payroll_line_ids.amount == 500 * self.fixed_rate
+        assert other_target.payroll_line_ids.amount == 500 * self.fixed_rate
+
+    def test_all_invalid_targets_reported(self):
+        self._create_invoice(amount=500)
+        other_target = self.target.copy({"state": "confirmed"})
+        targets = self.target | other_target
+        targets.compute()
+        targets.write({"state": "draft"})
+        self.wizard.target_ids = targets
+
+        with pytest.raises(ValidationError) as err:
+            self.wizard.confirm()
+
+        assert self.target.display_name in str(err.value)
+        assert other_target.display_name in str(err.value)
+
     def test_payroll_lines_shown_on_wizard_confirm(self):
         invoiced_amount = 500
         self._create_invoice(amount=invoiced_amount)
@@ -28,28 +28,43 @@ class CommissionPayrollPreparationWizard(models.TransientModel):
         return self._make_payroll_entry_action(entries)
 
     def _create_payroll_entries(self):
-        entries = self.env["payroll.preparation.line"]
+        self._check_targets()
+        vals_list = [self._get_payroll_entry_vals(t) for t in self.target_ids]
+        return self.env["payroll.preparation.line"].create(vals_list)
+
+    def _check_targets(self):
+        """Check that all selected targets can generate a payroll entry.
+
+        All invalid targets are reported together in a single error.
+        """
+        errors = []
 
         for target in self.target_ids:
-            if target.state != "confirmed":
-                raise ValidationError(_("You generate a payroll entry for a target in a state other than 'confirmed'."))
-            elif not target.left_to_generate:
-                raise ValidationError(_("There is no amount left to generate a payroll entry for."))
-            else:
-                entries |= self._create_payroll_entry(target)
-
-        return entries
-
-    def _create_payroll_entry(self, target):
-        return self.env["payroll.preparation.line"].create(
-            {
-                "company_id": target.company_id.id,
-                "period_id": self.period.id,
-                "employee_id": target.employee_id.id,
-                "commission_target_id": target.id,
-                "amount": target.left_to_generate,
-            }
-        )
+            error = self._get_target_error(target)
+            if error:
+                errors.append("{}: {}".format(target.display_name, error))
+
+        if errors:
+            raise ValidationError(
+                _("Payroll entries could not be generated for the following targets:")
+                + "\n"
+                + "\n".join(errors)
+            )
+
+    def _get_target_error(self, target):
+        if target.state != "confirmed":
+            return _("You generate a payroll entry for a target in a state other than 'confirmed'.")
+        elif not target.left_to_generate:
+            return _("There is no amount left to generate a payroll entry for.")
+
+    def _get_payroll_entry_vals(self, target):
+        return {
+            "company_id": target.company_id.id,
+            "period_id": self.period.id,
+            "employee_id": target.employee_id.id,
+            "commission_target_id": target.id,
+            "amount": target.left_to_generate,
+        }
 
     def _make_payroll_entry_action(self, entries):
         action = self.env.ref("commission_payroll_preparation.open_payroll_entries").read()[0]
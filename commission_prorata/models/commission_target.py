@@ -1,6 +1,7 @@
 # © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+from collections import defaultdict
 from odoo import fields, models, api
 
 
@@ -8,17 +9,40 @@ class CommissionTarget(models.Model):
     _inherit = "commission.target"
 
     prorata_days_worked = fields.Float(default=1, readonly=True)
-    eligible_amount = fields.Monetary(default=0, readonly=True)
+    eligible_amount = fields.Monetary(
+        compute="_compute_eligible_amount", store=True, compute_sudo=True
+    )
 
-    def compute(self):
-        super().compute()
+    @api.depends("total_amount", "prorata_days_worked")
+    def _compute_eligible_amount(self):
         for target in self:
-            target.sudo()._update_eligible_amount()
-
-    def _update_eligible_amount(self):
-        self.eligible_amount = self.total_amount * self.prorata_days_worked
+            target.eligible_amount = target.total_amount * target.prorata_days_worked
 
     @api.depends("eligible_amount", "already_generated")
     def _compute_left_to_generate(self):
         for target in self:
             target.left_to_generate = target.eligible_amount - target.already_generated
+
+    def _apply_prorata_days_worked(self, prorata_per_employee, default_prorata=None):
+        """Apply the prorata of days worked of each employee on their targets.
+
+        Targets are written in one batch per distinct prorata.
+        The eligible amounts and the amounts left to generate are
+        recomputed once for all targets, after every prorata is written.
+
+        :param prorata_per_employee: a dict mapping employee ids to a prorata
+        :param default_prorata: the prorata of employees missing from the dict.
+            If None, the targets of these employees keep their current prorata.
+        """
+        targets_per_prorata = defaultdict(lambda: self.browse())
+
+        for target in self:
+            prorata = prorata_per_employee.get(target.employee_id.id, default_prorata)
+            if prorata is not None and prorata != target.prorata_days_worked:
+                targets_per_prorata[prorata] |= target
+
+        with self.env.norecompute():
+            for prorata, targets in targets_per_prorata.items():
+                targets.write({"prorata_days_worked": prorata})
+
+        self.recompute()
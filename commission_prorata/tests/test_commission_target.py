@@ -13,3 +13,18 @@ class TestCommissionTarget(ProrataCase):
         self.target.compute()
 
         assert self.target.eligible_amount == self.target.total_amount * self.target.prorata_days_worked
+
+    def test_apply_prorata_days_worked(self):
+        self.target._apply_prorata_days_worked({self.employee.id: 0.25})
+        assert self.target.prorata_days_worked == 0.25
+        assert self.target.eligible_amount == self.target.total_amount * 0.25
+        assert self.target.left_to_generate == self.target.eligible_amount
+
+    def test_apply_prorata_days_worked_default(self):
+        self.target._apply_prorata_days_worked({}, 0.75)
+        assert self.target.prorata_days_worked == 0.75
+
+    def test_apply_prorata_days_worked_missing_employee(self):
+        self.target.prorata_days_worked = 0.5
+        self.target._apply_prorata_days_worked({})
+        assert self.target.prorata_days_worked == 0.5
@@ -33,3 +33,27 @@ class TestWizard(ProrataCase):
         assert created_payroll.amount == prorata_invoiced_amount
         assert self.target.prorata_days_worked == prorata
         assert self.target.eligible_amount == prorata_invoiced_amount
+
+    def test_create_payroll_prorata_per_employee(self):
+        other_employee = self.env["hr.employee"].create({"name": "Other"})
+        other_target = self.target.copy({"employee_id": other_employee.id})
+        other_target.write({"state": "confirmed", "total_amount": 100})
+        self.wizard.write(
+            {
+                "target_ids": [(4, other_target.id)],
+                "prorata_days_worked": 0.5,
+                "prorata_line_ids": [
+                    (
+                        0,
+                        0,
+                        {"employee_id": other_employee.id, "prorata_days_worked": 0.2},
+                    )
+                ],
+            }
+        )
+        self.wizard.confirm()
+
+        assert self.target.prorata_days_worked == 0.5
+        assert other_target.prorata_days_worked == 0.2
+        assert other_target.eligible_amount == 100 * 0.2
+        assert other_target.left_to_generate == 0
@@ -1,24 +1,36 @@
 # © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
-from odoo.exceptions import ValidationError
-from odoo import api, fields, models, _
+from odoo import fields, models
 
 
 class CommissionPayrollPreparationWizard(models.TransientModel):
     _inherit = "commission.payroll.preparation.wizard"
 
     prorata_days_worked = fields.Float(default=1)
+    prorata_line_ids = fields.One2many(
+        "commission.payroll.preparation.wizard.prorata", "wizard_id"
+    )
 
     def confirm(self):
-        self._update_target_proratas()
-        self._update_target_eligible_amounts()
+        self.target_ids._apply_prorata_days_worked(
+            self._get_prorata_per_employee(), self.prorata_days_worked
+        )
         return super().confirm()
 
-    def _update_target_proratas(self):
-        for target in self.target_ids:
-            target.prorata_days_worked = self.prorata_days_worked
+    def _get_prorata_per_employee(self):
+        return {
+            line.employee_id.id: line.prorata_days_worked
+            for line in self.prorata_line_ids
+        }
 
-    def _update_target_eligible_amounts(self):
-        for target in self.target_ids:
-            target.eligible_amount = target.total_amount * target.prorata_days_worked
+
+class CommissionPayrollPreparationWizardProrata(models.TransientModel):
+    _name = "commission.payroll.preparation.wizard.prorata"
+    _description = "Commission Payroll Preparation Wizard Prorata"
+
+    wizard_id = fields.Many2one(
+        "commission.payroll.preparation.wizard", required=True, ondelete="cascade"
+    )
+    employee_id = fields.Many2one("hr.employee", required=True)
+    prorata_days_worked = fields.Float(default=1)
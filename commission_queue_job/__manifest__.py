@@ -0,0 +1,19 @@
+# © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+{
+    "name": "Commission Queue Job",
+    "version": "1.0.0",
+    "author": "Numigi",
+    "maintainer": "Numigi",
+    "website": "https://bit.ly/numigi-com",
+    "license": "LGPL-3",
+    "category": "Sales",
+    "summary": "Compute commission targets in background jobs",
+    "depends": ["commission", "queue_job"],
+    "data": [
+        "data/queue_job_function.xml",
+        "views/commission_target.xml",
+    ],
+    "installable": True,
+}
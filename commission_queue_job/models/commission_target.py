@@ -0,0 +1,164 @@
+# © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import logging
+from collections import defaultdict
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError, ValidationError
+from odoo.addons.queue_job.exception import RetryableJobError
+
+_logger = logging.getLogger(__name__)
+
+COMPUTE_JOB_SIZE = 100
+DISPATCH_RETRY_DELAY = 10
+
+
+class CommissionTarget(models.Model):
+    _inherit = "commission.target"
+
+    compute_job_state = fields.Selection(
+        [
+            ("pending", "Pending"),
+            ("done", "Computed"),
+            ("failed", "Failed"),
+        ],
+        string="Background Compute",
+        readonly=True,
+        copy=False,
+    )
+    compute_job_error = fields.Text(
+        string="Background Compute Error", readonly=True, copy=False
+    )
+    compute_job_id = fields.Many2one(
+        "queue.job",
+        string="Background Compute Job",
+        readonly=True,
+        copy=False,
+        ondelete="set null",
+    )
+
+    def compute_async(self):
+        """Compute the targets in background jobs.
+
+        The targets are computed level by level, following the compute plan.
+        Each level is split in multiple jobs which can run in parallel.
+        """
+        self.check_extended_security_write()
+        targets = self.sudo()
+        if not targets:
+            return
+
+        targets.write(
+            {
+                "compute_job_state": "pending",
+                "compute_job_error": False,
+                "compute_job_id": False,
+            }
+        )
+
+        plan = [level.ids for level in targets._get_compute_plan()]
+        self.env["commission.target"].sudo()._dispatch_compute_plan(plan, [])
+
+    @api.model
+    def _dispatch_compute_plan(self, plan, previous_level_ids):
+        """Dispatch the jobs of the next level of the compute plan.
+
+        This method is executed in a job.
+        If the targets of the previous level are not all computed yet,
+        the job is retried later.
+
+        Targets of which the job failed or was deleted are considered failed,
+        so that the dispatch is not retried forever.
+
+        :param plan: the list of target ids per level that remain to compute
+        :param previous_level_ids: the ids of the targets of the previous level
+        """
+        previous_level = self.browse(previous_level_ids).exists()
+        previous_level._fail_lost_compute_jobs()
+
+        if any(t.compute_job_state == "pending" for t in previous_level):
+            raise RetryableJobError(
+                _("The previous level of targets is not computed yet."),
+                seconds=DISPATCH_RETRY_DELAY,
+                ignore_retry=True,
+            )
+
+        if any(t.compute_job_state == "failed" for t in previous_level):
+            self._cancel_compute_plan(plan)
+            return
+
+        if not plan:
+            return
+
+        next_level, remaining_plan = plan[0], plan[1:]
+        for chunk in _split_chunks(next_level, COMPUTE_JOB_SIZE):
+            targets = self.browse(chunk)
+            job = targets.with_delay()._compute_job()
+            targets.write({"compute_job_id": job.db_record().id})
+
+        if remaining_plan:
+            self.with_delay()._dispatch_compute_plan(remaining_plan, next_level)
+
+    def _fail_lost_compute_jobs(self):
+        """Fail the pending targets of which the job will not run anymore.
+
+        A job stopped with an unexpected error is failed by queue_job.
+        A job may also have been deleted by a user.
+        """
+        lost_targets = self.filtered(
+            lambda t: t.compute_job_state == "pending"
+            and t.compute_job_id.state in (False, "done", "failed")
+        )
+        for job, targets in _group_by_job(lost_targets).items():
+            targets.write(
+                {
+                    "compute_job_state": "failed",
+                    "compute_job_error": job.exc_info
+                    or _("The background job of the target was deleted."),
+                }
+            )
+
+    @api.model
+    def _cancel_compute_plan(self, plan):
+        targets = self.browse([target_id for level in plan for target_id in level])
+        targets.write(
+            {
+                "compute_job_state": "failed",
+                "compute_job_error": _(
+                    "The target was not computed because the compute "
+                    "of a target of a lower level failed."
+                ),
+            }
+        )
+
+    def _compute_job(self):
+        """Compute the targets and report the result on each target.
+
+        This method is executed in a job.
+
+        Only business errors are reported on the targets.
+        Other errors (i.e. concurrent updates) are raised,
+        so that the job is retried or failed by queue_job.
+        """
+        try:
+            with self.env.cr.savepoint():
+                self._compute()
+        except (UserError, ValidationError) as err:
+            _logger.warning(
+                "Failed to compute the commission targets %s: %s", self.ids, err.name
+            )
+            self.write({"compute_job_state": "failed", "compute_job_error": err.name})
+        else:
+            self.write({"compute_job_state": "done", "compute_job_error": False})
+
+
+def _group_by_job(targets):
+    targets_per_job = defaultdict(lambda: targets.browse())
+    for target in targets:
+        targets_per_job[target.compute_job_id] |= target
+    return targets_per_job
+
+
+def _split_chunks(ids, size):
+    for i in range(0, len(ids), size):
+        yield ids[i : i + size]
@@ -0,0 +1,119 @@
+# © 2021 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import pytest
+from psycopg2 import OperationalError
+from unittest.mock import patch
+from odoo.addons.commission.tests.common import CommissionCase
+from odoo.exceptions import UserError
+from odoo.addons.queue_job.exception import RetryableJobError
+
+
+class TestCommissionTarget(CommissionCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls._create_invoice(amount=5000)
+        cls.target = cls._create_target(target_amount=100000, fixed_rate=0.1)
+
+        cls.team_category = cls._create_category(
+            name="Manager", basis="my_team_commissions"
+        )
+        cls.team_category.child_category_ids = cls.category
+        cls.manager_target = cls._create_target(
+            employee=cls.manager, category=cls.team_category, fixed_rate=0.5
+        )
+        cls.targets = cls.target | cls.manager_target
+
+    def test_compute_async__targets_pending(self):
+        self.targets.sudo(self.manager_user).compute_async()
+        assert self.target.compute_job_state == "pending"
+        assert self.manager_target.compute_job_state == "pending"
+
+    def test_compute_async__jobs_created(self):
+        self.targets.sudo(self.manager_user).compute_async()
+        assert self._search_jobs("_compute_job")
+        assert self._search_jobs("_dispatch_compute_plan")
+
+    def test_compute_job(self):
+        self.target._compute_job()
+        assert self.target.compute_job_state == "done"
+        assert self.target.total_amount == 500
+
+    def test_compute_job__failure_reported_on_target(self):
+        target_class = type(self.env["commission.target"])
+        with patch.object(target_class, "_compute", side_effect=UserError("Boom")):
+            self.target._compute_job()
+        assert self.target.compute_job_state == "failed"
+        assert self.target.compute_job_error == "Boom"
+
+    def test_compute_job__database_error_raised(self):
+        self.target.compute_job_state = "pending"
+        target_class = type(self.env["commission.target"])
+        error = OperationalError("could not serialize access")
+        with patch.object(target_class, "_compute", side_effect=error):
+            with pytest.raises(OperationalError):
+                self.target._compute_job()
+        assert self.target.compute_job_state == "pending"
+
+    def test_compute_async__empty_recordset(self):
+        self.env["commission.target"].sudo(self.manager_user).compute_async()
+        assert not self._search_jobs("_dispatch_compute_plan")
+
+    def test_dispatch__empty_plan(self):
+        self.env["commission.target"]._dispatch_compute_plan([], [])
+        assert not self._search_jobs("_compute_job")
+
+    def test_dispatch__previous_level_pending(self):
+        self._set_pending_job(self.target)
+        with pytest.raises(RetryableJobError):
+            self.env["commission.target"]._dispatch_compute_plan(
+                [self.manager_target.ids], self.target.ids
+            )
+
+    def test_dispatch__previous_level_job_failed(self):
+        job = self._set_pending_job(self.target)
+        job.write({"state": "failed", "exc_info": "Boom"})
+        self.env["commission.target"]._dispatch_compute_plan(
+            [self.manager_target.ids], self.target.ids
+        )
+        assert self.target.compute_job_state == "failed"
+        assert self.target.compute_job_error == "Boom"
+        assert self.manager_target.compute_job_state == "failed"
+
+    def test_dispatch__previous_level_job_deleted(self):
+        self._set_pending_job(self.target).unlink()
+        self.env["commission.target"]._dispatch_compute_plan(
+            [self.manager_target.ids], self.target.ids
+        )
+        assert self.target.compute_job_state == "failed"
+        assert self.manager_target.compute_job_state == "failed"
+
+    def test_dispatch__job_linked_to_targets(self):
+        self.target.compute_job_state = "done"
+        self.env["commission.target"]._dispatch_compute_plan(
+            [self.manager_target.ids], self.target.ids
+        )
+        assert self.manager_target.compute_job_id in self._search_jobs("_compute_job")
+
+    def test_dispatch__previous_level_failed(self):
+        self.target.compute_job_state = "failed"
+        self.env["commission.target"]._dispatch_compute_plan(
+            [self.manager_target.ids], self.target.ids
+        )
+        assert self.manager_target.compute_job_state == "failed"
+
+    def test_dispatch__previous_level_done(self):
+        self.target.compute_job_state = "done"
+        self.env["commission.target"]._dispatch_compute_plan(
+            [self.manager_target.ids], self.target.ids
+        )
+        assert self._search_jobs("_compute_job")
+
+    def _set_pending_job(self, target):
+        job = target.with_delay()._compute_job().db_record()
+        target.write({"compute_job_state": "pending", "compute_job_id": job.id})
+        return job
+
+    def _search_jobs(self, method_name):
+        return self.env["queue.job"].search([("method_name", "=", method_name)])
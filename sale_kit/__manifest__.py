@@ -3,7 +3,7 @@
 
 {
     "name": "Sale Kit",
-    "version": "1.1.0",
+    "version": "1.3.0",
     "author": "Numigi",
     "maintainer": "Numigi",
     "website": "https://bit.ly/numigi-com",
@@ -15,6 +15,10 @@
         "product_kit",
         "sale_order_line_readonly_conditions",
     ],
-    "data": ["views/assets.xml", "views/sale_order.xml"],
+    "data": [
+        "views/assets.xml",
+        "views/product_template.xml",
+        "views/sale_order.xml",
+    ],
     "installable": True,
 }
@@ -1,4 +1,4 @@
 # © 2020 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
-from . import sale_order, sale_order_line
+from . import product_template, sale_order, sale_order_line
@@ -0,0 +1,19 @@
+# © 2020 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import fields, models
+
+
+class ProductTemplate(models.Model):
+
+    _inherit = "product.template"
+
+    kit_delivered_qty_method = fields.Selection(
+        [
+            ("first", "First Important Component"),
+            ("minimum", "Least Delivered Important Component"),
+        ],
+        "Kit Delivered Quantity Based On",
+        default="first",
+        required=True,
+    )
@@ -2,6 +2,7 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
 import re
+from collections import defaultdict
 from odoo import api, fields, models
 
 
@@ -10,29 +11,46 @@ class SaleOrder(models.Model):
     _inherit = "sale.order"
 
     next_kit_reference = fields.Char(compute="_compute_next_kit_reference")
-    available_kit_references = fields.Char(compute="_compute_available_kit_references")
-
-    @api.depends("order_line", "order_line.kit_reference")
-    def _compute_next_kit_reference(self):
-        for order in self:
-            order.next_kit_reference = order._get_next_kit_reference()
+    available_kit_references = fields.Char(
+        compute="_compute_available_kit_references", store=True
+    )
+    kit_reference_max_number = fields.Integer(readonly=True, copy=False)
 
     @api.depends("order_line", "order_line.kit_reference")
     def _compute_available_kit_references(self):
+        """Compute the kit references used on the order, sorted by number.
+
+        The field is stored, so that the lines are only read
+        when a kit reference is changed.
+        """
         for order in self:
-            references = {l.kit_reference for l in self.order_line if l.kit_reference}
-            sorted_refs = sorted(list(references))
-            order.available_kit_references = ",".join(sorted_refs)
+            numbers = order._get_kit_reference_numbers()
+            order.available_kit_references = ",".join(
+                sorted(numbers, key=lambda ref: (numbers[ref], ref))
+            )
 
-    def _get_next_kit_reference(self):
-        kit_refs = [ref for ref in self.order_line.mapped("kit_reference") if ref]
+    @api.depends("available_kit_references", "kit_reference_max_number")
+    def _compute_next_kit_reference(self):
+        """Compute the next kit reference without reading the order lines.
 
-        if not kit_refs:
-            return "K1"
+        The available references are sorted by number,
+        so the highest number used on the order is the one of the last reference.
+        """
+        for order in self:
+            references = order.available_kit_references
+            highest_number = max(
+                extract_kit_number(references.split(",")[-1]) if references else 0,
+                order.kit_reference_max_number,
+            )
+            order.next_kit_reference = format_kit_reference(highest_number + 1)
+
+    def _get_kit_reference_numbers(self):
+        """Get the number of each kit reference used on the order.
 
-        highest_ref = sorted(kit_refs)[-1]
-        number = extract_kit_number(highest_ref)
-        return "K{}".format(number + 1)
+        :return: a dict mapping each kit reference to its number
+        """
+        references = {l.kit_reference for l in self.order_line if l.kit_reference}
+        return {ref: extract_kit_number(ref) for ref in references}
 
     @api.onchange("order_line")
     def initialize_kits(self):
@@ -40,15 +58,17 @@ class SaleOrder(models.Model):
             lambda l: l.is_kit and not l.kit_initialized
         )
 
+        component_values = {}
         for line in uninitialized_kit_lines:
-            line.initialize_kit()
+            line.initialize_kit(component_values)
             line._compute_tax_id()
 
     @api.onchange("order_line")
     def update_kit_component_quantities(self):
         kits = self.order_line.filtered(lambda l: l.is_kit and l.product_uom_qty)
+        kit_index = self._get_kit_index()
         for kit in kits:
-            kit._update_kit_component_quantities()
+            kit._update_kit_component_quantities(kit_index)
 
     @api.onchange("order_line")
     def unlink_dangling_kit_components(self):
@@ -60,28 +80,74 @@ class SaleOrder(models.Model):
 
     @api.onchange("order_line")
     def update_kit_component_sequences(self):
-        self.recompute_order_line_sequences()
-        self.order_line = self.order_line.sorted(lambda l: l.sequence)
+        sorted_lines = self.recompute_order_line_sequences()
+        if list(sorted_lines) != list(self.order_line):
+            self.order_line = sorted_lines
 
     def recompute_order_line_sequences(self):
-        kits = self.get_kits()
-        components = self.get_kit_components()
-        other_lines = self.order_line - components - kits
-
-        (kits | other_lines).sorted_by_sequence().recompute_sequences()
-
-        kits.update({"kit_sequence": 0})
-
-        sorted_components = components.sorted_by_sequence().sorted_by_kit_sequence()
-        sorted_components.recompute_kit_sequences(kits)
-
-        all_lines = kits | components | other_lines
-        all_lines_sorted = all_lines.sorted(lambda l: (l.sequence, l.kit_sequence))
-        all_lines_sorted.recompute_sequences()
+        """Recompute the sequences of the order lines.
+
+        Each kit is followed by its components, ordered by kit sequence.
+        Only the lines for which the sequences changed are updated.
+
+        :return: the order lines, sorted by sequence
+        """
+        sorted_lines = self._get_order_lines_sorted_by_kit()
+
+        for sequence, (line, kit_sequence) in enumerate(sorted_lines, 1):
+            if line.sequence != sequence or line.kit_sequence != kit_sequence:
+                line.update({"sequence": sequence, "kit_sequence": kit_sequence})
+
+        return self.order_line.browse([line.id for line, _seq in sorted_lines])
+
+    def _get_order_lines_sorted_by_kit(self):
+        """Sort the order lines, placing the components of each kit under the kit.
+
+        Kits and lines outside of kits are sorted by sequence.
+        The components of a kit are sorted by kit sequence, then by sequence.
+        Components of a missing kit are placed at the end.
+
+        :return: a list of tuples (line, kit_sequence)
+        """
+        kit_references = set(self.get_kits_per_reference())
+        top_lines = []
+        components_per_kit = defaultdict(list)
+        dangling_components = []
+
+        for line in self.order_line:
+            if line.is_kit or not line.kit_reference:
+                top_lines.append(line)
+            elif line.kit_reference in kit_references:
+                components_per_kit[line.kit_reference].append(line)
+            else:
+                dangling_components.append(line)
+
+        result = []
+
+        for line in sorted(top_lines, key=lambda l: l.sequence):
+            if not line.is_kit:
+                result.append((line, line.kit_sequence))
+                continue
+
+            result.append((line, 0))
+            components = sorted(
+                components_per_kit.pop(line.kit_reference, []),
+                key=lambda l: (l.kit_sequence, l.sequence),
+            )
+            result.extend(
+                (component, kit_sequence)
+                for kit_sequence, component in enumerate(components, 1)
+            )
+
+        result.extend((line, line.kit_sequence) for line in dangling_components)
+        return result
 
     def get_kits_per_reference(self):
         return {l.kit_reference: l for l in self.get_kits()}
 
+    def _get_kit_index(self):
+        return KitIndex(self.order_line)
+
     def get_kits(self):
         return self.order_line.filtered(lambda l: l.is_kit)
 
@@ -89,6 +155,38 @@ class SaleOrder(models.Model):
         return self.order_line.filtered(lambda l: not l.is_kit and l.kit_reference)
 
 
+class KitIndex:
+    """Index the kit lines and the kit component lines of an order by reference.
+
+    The index is built in a single pass over the order lines.
+    It must be rebuilt when the lines or their kit references change.
+    """
+
+    def __init__(self, lines):
+        self._empty = lines.browse()
+        self._kits = {}
+        self._component_ids = defaultdict(list)
+
+        for line in lines:
+            ref = line.kit_reference
+            if not ref:
+                continue
+            elif line.is_kit:
+                self._kits.setdefault(ref, line)
+            else:
+                self._component_ids[ref].append(line.id)
+
+    def get_kit(self, ref):
+        return self._kits.get(ref, self._empty)
+
+    def get_components(self, ref):
+        return self._empty.browse(self._component_ids.get(ref, []))
+
+
 def extract_kit_number(ref: str) -> int:
     match = re.search(r"(?P<number>\d+)$", ref)
     return int(match.group()) if match else 0
+
+
+def format_kit_reference(number: int) -> str:
+    return "K{}".format(number)
@@ -4,6 +4,7 @@
 from collections import defaultdict
 from odoo import api, fields, models
 from odoo.addons import decimal_precision as dp
+from .sale_order import extract_kit_number
 
 
 class SaleOrderLine(models.Model):
@@ -31,6 +32,38 @@ class SaleOrderLine(models.Model):
         "sale.order.line", "Kit", store=True, compute="_compute_kit_id", copy=False
     )
 
+    @api.model
+    def create(self, vals):
+        line = super().create(vals)
+        if line.kit_reference:
+            line._update_kit_reference_max_number()
+        return line
+
+    @api.multi
+    def write(self, vals):
+        super().write(vals)
+        if vals.get("kit_reference"):
+            self._update_kit_reference_max_number()
+        return True
+
+    def _update_kit_reference_max_number(self):
+        """Keep the highest kit number ever used on the orders of the lines.
+
+        Only the kit references of the given lines are evaluated.
+        Kit references of deleted kits are not reused afterward.
+        """
+        highest_number_per_order = defaultdict(int)
+        for line in self.filtered(lambda l: l.kit_reference):
+            number = extract_kit_number(line.kit_reference)
+            order = line.order_id
+            highest_number_per_order[order] = max(
+                highest_number_per_order[order], number
+            )
+
+        for order, number in highest_number_per_order.items():
+            if number > order.kit_reference_max_number:
+                order.kit_reference_max_number = number
+
     @api.onchange("product_id")
     def product_id_change(self):
         res = super().product_id_change()
@@ -44,10 +77,10 @@ class SaleOrderLine(models.Model):
         if self.is_kit:
             self.price_unit = 0
 
-    def initialize_kit(self):
+    def initialize_kit(self, component_values=None):
         self.kit_reference = self.next_kit_reference
         self.kit_previous_quantity = self.product_uom_qty
-        self.add_kit_components()
+        self.add_kit_components(component_values)
         self.set_kit_line_readonly_conditions()
         self.kit_initialized = True
 
@@ -59,18 +92,36 @@ class SaleOrderLine(models.Model):
         self.product_uom_readonly = True
         self.kit_reference_readonly = True
 
-    def add_kit_components(self):
+    def add_kit_components(self, component_values=None):
+        self.order_id.order_line |= self.prepare_kit_components(component_values)
+
+    def prepare_kit_components(self, component_values=None):
+        """Prepare the lines of all components of the kit.
+
+        The lines are returned together, so that they are added
+        to the sale order in a single operation.
+
+        :param component_values: a dict in which the values given by the product
+            onchanges are kept per component, so that these onchanges are played
+            once per component, product unit and quantity.
+        """
+        if component_values is None:
+            component_values = {}
+
+        components = self.env["sale.order.line"]
         for kit_line in self.product_id.kit_line_ids:
-            component_line = self.prepare_kit_component(kit_line)
-            self.order_id.order_line |= component_line
+            components |= self.prepare_kit_component(kit_line, component_values)
+        return components
 
-    def prepare_kit_component(self, kit_line):
+    def prepare_kit_component(self, kit_line, component_values=None):
         new_line = self.new({})
         new_line.kit_reference = self.kit_reference
         new_line.is_kit_component = True
         new_line.is_important_kit_component = kit_line.is_important
         self._set_kit_component_display_type(new_line, kit_line)
-        self._set_kit_component_product_and_quantity(new_line, kit_line)
+        self._set_kit_component_product_and_quantity(
+            new_line, kit_line, component_values
+        )
         self._set_kit_component_readonly_conditions(new_line, kit_line)
         self._set_kit_component_name(new_line, kit_line)
         self._set_kit_component_discount(new_line)
@@ -79,7 +130,17 @@ class SaleOrderLine(models.Model):
     def _set_kit_component_display_type(self, new_line, kit_line):
         new_line.display_type = kit_line.display_type
 
-    def _set_kit_component_product_and_quantity(self, new_line, kit_line):
+    def _set_kit_component_product_and_quantity(
+        self, new_line, kit_line, component_values=None
+    ):
+        key = (kit_line.component_id.id, kit_line.uom_id.id, kit_line.quantity)
+        values = component_values.get(key) if component_values is not None else None
+
+        if values is not None:
+            new_line.update(values)
+            return
+
+        preset_fields = set(new_line._cache)
         new_line.set_product_and_quantity(
             order=self.order_id,
             product=kit_line.component_id,
@@ -87,6 +148,9 @@ class SaleOrderLine(models.Model):
             qty=kit_line.quantity,
         )
 
+        if component_values is not None:
+            component_values[key] = _get_onchange_values(new_line, preset_fields)
+
     def _set_kit_component_name(self, new_line, kit_line):
         if kit_line.name:
             new_line.name = kit_line.name
@@ -114,11 +178,11 @@ class SaleOrderLine(models.Model):
         new_line.product_uom_readonly = is_important
         new_line.kit_reference_readonly = is_important
 
-    def _update_kit_component_quantities(self):
+    def _update_kit_component_quantities(self, kit_index=None):
         factor = self._get_kit_components_quantity_factor()
 
         if factor != 1:
-            self._apply_kit_components_quantity_factor(factor)
+            self._apply_kit_components_quantity_factor(factor, kit_index)
 
         self.kit_previous_quantity = self.product_uom_qty
 
@@ -129,50 +193,34 @@ class SaleOrderLine(models.Model):
             else 1
         )
 
-    def _apply_kit_components_quantity_factor(self, factor):
-        for line in self._get_kit_component_lines():
+    def _apply_kit_components_quantity_factor(self, factor, kit_index=None):
+        for line in self._get_kit_component_lines(kit_index):
             line.product_uom_qty *= factor
             line.product_uom_change()
 
-    def recompute_sequences(self):
-        next_sequence = 1
-        for line in self:
-            line.sequence = next_sequence
-            next_sequence += 1
-
-    def recompute_kit_sequences(self, kits):
-        kit_sequences = {l.kit_reference: l.sequence for l in kits}
-        next_sequences = defaultdict(lambda: 1)
-
-        for line in self:
-            kit_ref = line.kit_reference
-            line.sequence = kit_sequences.get(kit_ref)
-            line.kit_sequence = next_sequences[kit_ref]
-            next_sequences[kit_ref] += 1
-
-    def sorted_by_sequence(self):
-        return self.sorted(key=lambda l: l.sequence)
-
-    def sorted_by_kit_sequence(self):
-        return self.sorted(key=lambda l: l.kit_sequence)
-
-    def _get_kit_line(self):
+    def _get_kit_line(self, kit_index=None):
         if self.is_kit or not self.kit_reference:
             return None
 
-        return self.order_id.order_line.filtered(
-            lambda l: l.is_kit and l.kit_reference == self.kit_reference
-        )[0:1]
+        if kit_index is None:
+            kit_index = self.order_id._get_kit_index()
 
-    def _get_kit_component_lines(self):
-        return self.order_id.order_line.filtered(
-            lambda l: not l.is_kit and l.kit_reference == self.kit_reference
-        )
+        return kit_index.get_kit(self.kit_reference)
+
+    def _get_kit_component_lines(self, kit_index=None):
+        if kit_index is None:
+            kit_index = self.order_id._get_kit_index()
+
+        return kit_index.get_components(self.kit_reference)
 
     @api.depends("kit_reference")
     def _compute_kit_id(self):
+        kit_indexes = {}
         for line in self:
-            line.kit_id = line._get_kit_line()
+            order = line.order_id
+            if order not in kit_indexes:
+                kit_indexes[order] = order._get_kit_index()
+            line.kit_id = line._get_kit_line(kit_indexes[order])
 
     @api.depends("is_kit")
     def _compute_qty_delivered_method(self):
@@ -182,29 +230,68 @@ class SaleOrderLine(models.Model):
         )
         kits.update({"qty_delivered_method": "kit"})
 
-    @api.depends("product_uom_qty", "kit_line_ids", "kit_line_ids.qty_delivered")
+    @api.depends(
+        "product_uom_qty",
+        "product_id.kit_delivered_qty_method",
+        "kit_line_ids",
+        "kit_line_ids.qty_delivered",
+    )
     def _compute_qty_delivered(self):
         super()._compute_qty_delivered()
         kit_lines = self.filtered(lambda l: l.qty_delivered_method == "kit")
         kit_lines._compute_kit_qty_delivered()
 
     def _compute_kit_qty_delivered(self):
+        components_per_kit = self._get_important_components_per_kit()
         for line in self:
-            line.qty_delivered = line._get_kit_qty_delivered()
-
-    def _get_kit_qty_delivered(self):
-        ratio = self._get_kit_qty_delivered_ratio()
-        return ratio * self.product_uom_qty
-
-    def _get_kit_qty_delivered_ratio(self):
-        component = self._get_first_important_component()
-
-        if component.product_uom_qty:
-            return component.qty_delivered / component.product_uom_qty
-        elif component.qty_delivered:
-            return 1
-        else:
-            return 0
-
-    def _get_first_important_component(self):
-        return self.kit_line_ids.filtered("is_important_kit_component")[:1]
+            components = components_per_kit.get(line, [])
+            ratio = line._get_kit_qty_delivered_ratio(components)
+            line.qty_delivered = ratio * line.product_uom_qty
+
+    def _get_important_components_per_kit(self):
+        """Group the important components of the kits by kit.
+
+        The components of all kits are read together.
+
+        :return: a dict mapping each kit line to its important components,
+            in order of sequence.
+        """
+        components_per_kit = defaultdict(list)
+        for component in self.mapped("kit_line_ids"):
+            if component.is_important_kit_component:
+                components_per_kit[component.kit_id].append(component)
+        return components_per_kit
+
+    def _get_kit_qty_delivered_ratio(self, components):
+        if self.product_id.kit_delivered_qty_method != "minimum":
+            components = components[:1]
+
+        return min((get_delivered_ratio(c) for c in components), default=0)
+
+
+def get_delivered_ratio(line):
+    if line.product_uom_qty:
+        return line.qty_delivered / line.product_uom_qty
+    elif line.qty_delivered:
+        return 1
+    else:
+        return 0
+
+
+def _get_onchange_values(line, preset_fields):
+    """Get the values set on a new line by its onchanges.
+
+    The id and the computed fields are excluded, because their value depends
+    on the line itself and on the fields set before the onchanges.
+
+    :param line: the new sale order line
+    :param preset_fields: the names of the fields set before the onchanges
+    :return: a dict of values to update another line with
+    """
+    return {
+        name: line[name]
+        for name in line._cache
+        if name != "id"
+        and name not in preset_fields
+        and not line._fields[name].compute
+    }
@@ -2,6 +2,7 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
 from ddt import ddt, data, unpack
+from unittest.mock import patch
 from ..models.sale_order import extract_kit_number
 from .common import SaleOrderLineCase
 
@@ -54,6 +55,56 @@ class TestSaleOrderLine(SaleOrderLineCase):
 
             assert self.order.available_kit_references == "K1,K2,K3"
 
+    def test_kit_references_sorted_numerically(self):
+        with self.env.do_in_onchange():
+            for ref in ("K10", "K9", "K2"):
+                line = self.new_so_line()
+                line.kit_reference = ref
+                self.order.order_line |= line
+
+            assert self.order.available_kit_references == "K2,K9,K10"
+            assert self.order.next_kit_reference == "K11"
+
+    def test_next_kit_reference__after_kit_deleted(self):
+        self.order.kit_reference_max_number = 5
+        assert self.order.next_kit_reference == "K6"
+
+    def test_kit_reference_max_number__line_created(self):
+        order = self._create_order()
+        line = self._create_order_line(order, "K7")
+        line.unlink()
+        assert order.kit_reference_max_number == 7
+        assert order.next_kit_reference == "K8"
+
+    def test_kit_reference_max_number__line_written(self):
+        order = self._create_order()
+        line = self._create_order_line(order, "K2")
+        line.kit_reference = "K5"
+        assert order.kit_reference_max_number == 5
+
+    def test_kit_reference_max_number__not_lowered(self):
+        order = self._create_order()
+        self._create_order_line(order, "K5")
+        self._create_order_line(order, "K3")
+        assert order.kit_reference_max_number == 5
+
+    def _create_order(self):
+        return self.env["sale.order"].create(
+            {"partner_id": self.env.user.partner_id.id}
+        )
+
+    def _create_order_line(self, order, kit_reference):
+        return self.env["sale.order.line"].create(
+            {
+                "order_id": order.id,
+                "product_id": self.component_a.id,
+                "name": "/",
+                "product_uom_qty": 1,
+                "product_uom": self.component_a.uom_id.id,
+                "kit_reference": kit_reference,
+            }
+        )
+
     @data(("K1", 1), ("ABC999", 999), ("WRONG", 0))
     @unpack
     def test_extract_kit_number(self, ref, expected_number):
@@ -66,6 +117,65 @@ class TestSaleOrderLine(SaleOrderLineCase):
         self.add_kit_on_sale_order()
         assert len(self.order.order_line) == 8
 
+    def test_prepare_kit_components(self):
+        line = self.new_so_line()
+        self.select_product(line, self.kit)
+        line.kit_reference = "K1"
+        components = line.prepare_kit_components()
+        assert components.mapped("product_id") == (
+            self.component_a | self.component_b | self.component_z
+        )
+        assert set(components.mapped("kit_reference")) == {"K1"}
+
+    def test_component_onchanges_played_once_per_component(self):
+        self.kit.kit_line_ids[0].copy()
+        line = self.new_so_line()
+        self.select_product(line, self.kit)
+        line_class = type(self.env["sale.order.line"])
+        onchange = line_class.set_product_and_quantity
+        with patch.object(
+            line_class, "set_product_and_quantity", autospec=True, side_effect=onchange
+        ) as onchange_mock:
+            components = line.prepare_kit_components()
+        assert onchange_mock.call_count == 3
+        lines = components.filtered(lambda l: l.product_id == self.component_a)
+        assert len(lines) == 2
+        assert lines.mapped("product_uom") == self.component_a_uom
+        assert lines[0].price_unit == lines[1].price_unit
+        assert lines.mapped("order_id") == self.order
+
+    def test_component_onchanges_shared_between_kits_of_order(self):
+        for _i in range(2):
+            kit_line = self.new_so_line()
+            self.select_product(kit_line, self.kit)
+            self.order.order_line |= kit_line
+
+        line_class = type(self.env["sale.order.line"])
+        onchange = line_class.set_product_and_quantity
+        with patch.object(
+            line_class, "set_product_and_quantity", autospec=True, side_effect=onchange
+        ) as onchange_mock:
+            self.order.initialize_kits()
+
+        assert onchange_mock.call_count == 3
+        assert len(self.get_component_lines()) == 6
+
+    def test_kit_index(self):
+        k1 = self.add_kit_on_sale_order()
+        k2 = self.add_kit_on_sale_order()
+        kit_index = self.order._get_kit_index()
+        assert kit_index.get_kit("K1") == k1
+        assert kit_index.get_kit("K2") == k2
+        assert len(kit_index.get_components("K2")) == 3
+        assert not kit_index.get_kit("K3")
+        assert not kit_index.get_components("K3")
+
+    def test_get_kit_line(self):
+        k1 = self.add_kit_on_sale_order()
+        component = self.get_component_lines()[0]
+        assert component._get_kit_line() == k1
+        assert k1._get_kit_component_lines() == self.get_component_lines()
+
     def test_products(self):
         self.add_kit_on_sale_order()
         lines = self.order.order_line
@@ -82,6 +192,20 @@ class TestSaleOrderLine(SaleOrderLineCase):
         assert not lines[0].price_unit
         assert lines[1].price_unit
 
+    def test_component_price_follows_product_price(self):
+        self.component_a.list_price = 10
+        self.add_kit_on_sale_order()
+        self.component_a.list_price = 20
+        self.add_kit_on_sale_order()
+        lines = self.get_component_lines()
+        assert lines[3].price_unit == lines[0].price_unit * 2
+
+    def test_components_follow_kit_lines(self):
+        self.add_kit_on_sale_order()
+        self.kit.kit_line_ids[-1].unlink()
+        self.add_kit_on_sale_order()
+        assert len(self.get_component_lines()) == 5
+
     def test_is_component(self):
         self.add_kit_on_sale_order()
         lines = self.order.order_line
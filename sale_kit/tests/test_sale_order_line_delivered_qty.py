@@ -85,3 +85,29 @@ class TestDeliveredQty(KitCase):
         assert self.kit_line.qty_delivered == 0
         self._deliver_component(self.important_component_1, 1)
         assert self.kit_line.qty_delivered == 2
+
+    def test_minimum_over_important_components(self):
+        self.kit.kit_delivered_qty_method = "minimum"
+        self._deliver_component(self.important_component_1, 4)
+        self._deliver_component(self.important_component_2, 5)
+        assert self.kit_line.qty_delivered == 1
+
+    def test_minimum_over_important_components__all_delivered(self):
+        self.kit.kit_delivered_qty_method = "minimum"
+        self._deliver_component(self.important_component_1, 4)
+        self._deliver_component(self.important_component_2, 10)
+        assert self.kit_line.qty_delivered == 2
+
+    def test_method_changed_after_delivery(self):
+        self._deliver_component(self.important_component_1, 4)
+        self._deliver_component(self.important_component_2, 5)
+        assert self.kit_line.qty_delivered == 2
+
+        self.kit.kit_delivered_qty_method = "minimum"
+        assert self.kit_line.qty_delivered == 1
+
+    def test_kits_computed_together(self):
+        kits = self.order.order_line.filtered("is_kit")
+        self._deliver_component(self.important_component_1, 2)
+        kits._compute_kit_qty_delivered()
+        assert kits.mapped("qty_delivered") == [1, 0]
@@ -82,3 +82,25 @@ class TestKitComponentSorting(SaleOrderLineCase):
             self.other_line_1,
             self.other_line_2,
         ]
+
+    def test_sequences(self):
+        self.k1.sequence = 1
+        self.k2.sequence = 3
+        self.other_line_1.sequence = 2
+        self.other_line_2.sequence = 4
+        self.order.update_kit_component_sequences()
+        assert [(l.sequence, l.kit_sequence) for l in self.order.order_line] == [
+            (1, 0),
+            (2, 1),
+            (3, 2),
+            (4, 0),
+            (5, 0),
+            (6, 1),
+            (7, 2),
+            (8, 0),
+        ]
+
+    def test_component_without_kit_placed_at_the_end(self):
+        self.order.order_line -= self.k1
+        self.order.update_kit_component_sequences()
+        assert list(self.order.order_line)[-2:] == [self.k1_1, self.k1_2]
@@ -3,7 +3,7 @@
 
 {
     "name": "Sale Rental",
-    "version": "1.0.0",
+    "version": "1.2.0",
     "author": "Numigi",
     "maintainer": "Numigi",
     "website": "https://bit.ly/numigi-com",
@@ -13,6 +13,7 @@
     "depends": ["sale_kit", "sale_stock", "stock_rental"],
     "data": [
         "data/ir_cron.xml",
+        "security/ir.model.access.csv",
         "views/sale_order.xml",
         "views/product_template.xml",
         "views/menu.xml",
@@ -0,0 +1,15 @@
+# © 2021 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import api, SUPERUSER_ID
+
+
+def migrate(cr, version):
+    if not version:
+        return
+
+    env = api.Environment(cr, SUPERUSER_ID, {})
+    lines = env["sale.order.line"].search(
+        [("order_id.is_rental", "=", True), ("state", "in", ("sale", "done"))]
+    )
+    lines._update_rental_bookings()
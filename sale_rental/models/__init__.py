@@ -9,5 +9,7 @@ from . import (
     res_config_settings,
     sale_order,
     sale_order_line,
+    sale_rental_booking,
     stock_move,
+    stock_picking,
 )
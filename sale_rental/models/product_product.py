@@ -20,3 +20,18 @@ class Product(models.Model):
     @api.constrains("uom_id")
     def _check_rental_service_is_in_days(self):
         self.mapped("rented_product_ids")._check_rental_service_is_in_days()
+
+    def get_rental_available_qty(self, date_from, date_to=None, warehouse=None):
+        """Get the quantity of the product available for rental during a period.
+
+        :param date_from: the beginning of the period
+        :param date_to: the end of the period (one day after date_from by default)
+        :param warehouse: the warehouse (the main warehouse of the company by default)
+        :return: the available quantity in the unit of measure of the product
+        """
+        warehouse = warehouse or self.env["stock.warehouse"].search(
+            [("company_id", "=", self.env.user.company_id.id)], limit=1
+        )
+        return self.env["sale.rental.booking"].get_available_qty(
+            self, warehouse, date_from, date_to
+        )
@@ -17,19 +17,68 @@ class SaleOrder(models.Model):
     def action_confirm(self):
         super().action_confirm()
         rental_orders = self.filtered(lambda l: l.is_rental)
-        for line in rental_orders.mapped("order_line"):
-            line.propagate_stock_rental_dates()
+        rental_orders.mapped("order_line").propagate_stock_rental_dates()
         return True
 
+    @api.multi
+    def action_cancel(self):
+        result = super().action_cancel()
+        rental_orders = self.filtered(lambda o: o.is_rental)
+        rental_orders.mapped("order_line")._update_rental_bookings()
+        return result
+
     @api.model
     def create(self, vals):
-        order = super().create(vals)
+        """Propagate the rental dates once, after all lines are created."""
+        order = super(
+            SaleOrder, self.with_context(defer_rental_date_propagation=True)
+        ).create(vals)
+        order = order.with_context(self._context)
         order.propagate_service_rental_dates()
         return order
 
+    @api.multi
+    def write(self, vals):
+        """Propagate the rental dates once, after all lines are written.
+
+        Only the kits of the lines added or changed by the write are processed.
+        """
+        if "order_line" not in vals:
+            return super().write(vals)
+
+        lines_before = self.mapped("order_line")
+        super(
+            SaleOrder, self.with_context(defer_rental_date_propagation=True)
+        ).write(vals)
+        changed_lines = self._get_lines_with_changed_rental_dates(
+            vals["order_line"], lines_before
+        )
+        changed_lines.propagate_service_rental_dates()
+        return True
+
+    def _get_lines_with_changed_rental_dates(self, commands, lines_before):
+        """Get the order lines for which the rental dates must be propagated.
+
+        :param commands: the commands written on the field order_line
+        :param lines_before: the order lines before the commands were written
+        :return: the new order lines and the lines updated
+            with a field that triggers the propagation
+        """
+        trigger_fields = self.env["sale.order.line"]._get_rental_date_trigger_fields()
+        line_ids = set()
+        for command in commands:
+            if command[0] == 1 and trigger_fields.intersection(command[2]):
+                line_ids.add(command[1])
+            elif command[0] == 4:
+                line_ids.add(command[1])
+            elif command[0] == 6:
+                line_ids.update(command[2])
+
+        lines = self.mapped("order_line")
+        return (lines - lines_before) | lines.filtered(lambda l: l.id in line_ids)
+
     def propagate_service_rental_dates(self):
-        for line in self.mapped("order_line").filtered(lambda l: l.is_rental_service):
-            line.propagate_service_rental_dates()
+        self.mapped("order_line").propagate_service_rental_dates()
 
 
 class SaleOrderWithReturnedQty(models.Model):
@@ -55,13 +104,32 @@ class SaleOrderWithExtraSmartButton(models.Model):
 
     def _compute_picking_ids(self):
         super()._compute_picking_ids()
+        rental_return_counts = self._get_rental_return_counts()
         for order in self:
-            return_pickings = self._get_rental_return_pickings()
-            order.delivery_count -= len(return_pickings)
-            order.rental_return_count = len(return_pickings)
+            rental_return_count = rental_return_counts.get(
+                order.procurement_group_id.id, 0
+            )
+            order.delivery_count -= rental_return_count
+            order.rental_return_count = rental_return_count
+
+    def _get_rental_return_counts(self):
+        """Get the number of rental return pickings per procurement group.
+
+        The pickings of all orders are counted with a single grouped query.
+        """
+        groups = self.mapped("procurement_group_id")
+        if not groups:
+            return {}
+
+        result = self.env["stock.picking"].read_group(
+            [("group_id", "in", groups.ids), ("is_rental_return", "=", True)],
+            ["group_id"],
+            ["group_id"],
+        )
+        return {r["group_id"][0]: r["group_id_count"] for r in result}
 
     def _get_rental_return_pickings(self):
-        return self.mapped("picking_ids").filtered(_is_rental_return_picking)
+        return self.mapped("picking_ids").filtered(lambda p: p.is_rental_return)
 
     @api.multi
     def action_view_delivery(self):
@@ -81,17 +149,3 @@ class SaleOrderWithExtraSmartButton(models.Model):
         action = self.env.ref("stock.action_picking_tree_all").read()[0]
         action["domain"] = [("id", "in", pickings.ids)]
         return action
-
-
-def _is_rental_return_picking(picking):
-    origin_moves = _get_move_with_origin_moves(picking.move_lines)
-    return any(m for m in origin_moves if m.is_rental_return_move())
-
-
-def _get_move_with_origin_moves(moves, depth=10):
-    origin_moves = moves.mapped("move_orig_ids")
-    return (
-        moves | _get_move_with_origin_moves(origin_moves, depth - 1)
-        if origin_moves and depth > 0
-        else moves
-    )
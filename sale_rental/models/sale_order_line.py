@@ -1,10 +1,12 @@
 # © 2020 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+from collections import defaultdict
 from datetime import datetime, timedelta
 from odoo import api, fields, models, _
 from odoo.addons import decimal_precision as dp
 from odoo.exceptions import ValidationError
+from odoo.tools import float_compare
 
 
 class SaleOrderLine(models.Model):
@@ -105,20 +107,22 @@ class SaleOrderLine(models.Model):
         super(SaleOrderLine, other_lines)._action_launch_stock_rule()
         return True
 
-    def initialize_kit(self):
+    def initialize_kit(self, component_values=None):
         if self.is_rental_order:
             self._check_kit_can_be_rented()
 
-        super().initialize_kit()
+        super().initialize_kit(component_values)
 
         if self.is_rental_order:
             self._add_readonly_flags_for_rented_kit()
 
-    def add_kit_components(self):
+    def prepare_kit_components(self, component_values=None):
+        components = super().prepare_kit_components(component_values)
+
         if self.is_rental_order:
-            self._add_kit_rental_service_to_order()
+            components = self._prepare_kit_rental_service_line() | components
 
-        super().add_kit_components()
+        return components
 
     def _check_kit_can_be_rented(self):
         if not self.product_id.can_be_rented:
@@ -126,18 +130,18 @@ class SaleOrderLine(models.Model):
                 _("The kit {} can not be rented.").format(self.product_id.display_name)
             )
 
-    def _add_kit_rental_service_to_order(self):
+    def _prepare_kit_rental_service_line(self):
         service_line = self.prepare_kit_rental_service()
         service_line._compute_tax_id()
-        self.order_id.order_line |= service_line
+        return service_line
 
     def _add_readonly_flags_for_rented_kit(self):
         self.product_uom_qty_readonly = True
         self.price_unit_readonly = True
         self.taxes_readonly = True
 
-    def prepare_kit_component(self, kit_line):
-        new_line = super().prepare_kit_component(kit_line)
+    def prepare_kit_component(self, kit_line, component_values=None):
+        new_line = super().prepare_kit_component(kit_line, component_values)
 
         if self.is_rental_order:
             new_line.price_unit = 0
@@ -185,43 +189,62 @@ class SaleOrderLineWithRentalDates(models.Model):
     @api.model
     def create(self, vals):
         line = super().create(vals)
-        line.refresh()
-        line.order_id.propagate_service_rental_dates()
+        if not self._context.get("defer_rental_date_propagation"):
+            line.propagate_service_rental_dates()
         return line
 
     @api.multi
     def write(self, vals):
         super().write(vals)
-        if (
-            "kit_reference" in vals
-            or "rental_date_from" in vals
-            or "rental_date_to" in vals
-        ):
-            self.mapped("order_id").propagate_service_rental_dates()
+        deferred = self._context.get("defer_rental_date_propagation")
+        if not deferred and self._get_rental_date_trigger_fields().intersection(vals):
+            self.propagate_service_rental_dates()
 
         if "expected_rental_date" in vals or "expected_return_date" in vals:
-            for line in self:
-                line.propagate_stock_rental_dates()
+            self.propagate_stock_rental_dates()
 
         return True
 
+    @api.model
+    def _get_rental_date_trigger_fields(self):
+        return {"kit_reference", "rental_date_from", "rental_date_to"}
+
     def propagate_service_rental_dates(self):
-        lines_to_update = self.order_id.order_line.filtered(
-            lambda l: (
-                self._is_in_same_kit(l)
-                and not self._service_rental_dates_already_propagated(l)
-            )
-        )
-        if lines_to_update:
-            lines_to_update.write(
-                {
-                    "expected_rental_date": self.rental_date_from,
-                    "expected_return_date": self.rental_date_to,
-                }
+        """Propagate the rental dates of services to the other lines of their kits.
+
+        Only the kits of the given lines are processed.
+        The lines of these kits are fetched with a single query,
+        then grouped by rental dates, so that a single write is done
+        per pair of dates.
+        """
+        kit_lines = self._get_lines_of_same_kits()
+        service_per_kit = {
+            (l.order_id.id, l.kit_reference): l
+            for l in kit_lines
+            if l.is_rental_service
+        }
+        line_ids_per_dates = defaultdict(list)
+
+        for line in kit_lines:
+            service = service_per_kit.get((line.order_id.id, line.kit_reference))
+            if service and not service._service_rental_dates_already_propagated(line):
+                dates = (service.rental_date_from, service.rental_date_to)
+                line_ids_per_dates[dates].append(line.id)
+
+        for (date_from, date_to), line_ids in line_ids_per_dates.items():
+            self.browse(line_ids).write(
+                {"expected_rental_date": date_from, "expected_return_date": date_to}
             )
 
-    def _is_in_same_kit(self, other_line):
-        return other_line.kit_reference == self.kit_reference
+    def _get_lines_of_same_kits(self):
+        kits = {(l.order_id.id, l.kit_reference) for l in self}
+        lines = self.search(
+            [
+                ("order_id", "in", self.mapped("order_id").ids),
+                ("kit_reference", "in", list({ref for _, ref in kits})),
+            ]
+        )
+        return lines.filtered(lambda l: (l.order_id.id, l.kit_reference) in kits)
 
     def _service_rental_dates_already_propagated(self, other_line):
         return (
@@ -230,23 +253,45 @@ class SaleOrderLineWithRentalDates(models.Model):
         )
 
     def propagate_stock_rental_dates(self):
-        rental_date = self.expected_rental_date or datetime.now()
-        return_date = self.expected_return_date or rental_date
-        self._propagate_rental_date_to_stock_moves(rental_date)
-        self._propagate_return_date_to_stock_moves(return_date)
-
-    def _propagate_rental_date_to_stock_moves(self, date_):
-        rental_moves = self.move_ids.filtered(lambda m: m.is_rental_move())
-        moves_to_update = rental_moves.with_all_origin_moves().filtered(
-            lambda m: not m.is_processed_move()
-        )
-        moves_to_update.set_expected_date(date_)
+        """Propagate the expected rental dates to the stock moves of the lines.
 
-    def _propagate_return_date_to_stock_moves(self, date_):
-        moves_to_update = self.move_ids.filtered(
-            lambda m: m.is_rental_return_move() and not m.is_processed_move()
-        )
-        moves_to_update.set_expected_date(date_)
+        The rental date is propagated to the rental moves and to all their
+        origin moves (i.e. in a delivery in multiple steps).
+        The return date is propagated to the rental return moves.
+
+        The moves are grouped by date, so that the moves of all lines
+        with the same date are written at once.
+        """
+        date_per_move_id = {}
+        origin_move_ids_per_move = self._get_rental_moves().get_chained_move_ids()
+
+        for line in self:
+            rental_date = line.expected_rental_date or datetime.now()
+            return_date = line.expected_return_date or rental_date
+
+            for move in line.move_ids.filtered(lambda m: m.is_rental_move()):
+                for move_id in origin_move_ids_per_move[move.id]:
+                    date_per_move_id[move_id] = rental_date
+
+            for move in line.move_ids.filtered(lambda m: m.is_rental_return_move()):
+                date_per_move_id[move.id] = return_date
+
+        self._set_stock_moves_expected_dates(date_per_move_id)
+        self._update_rental_bookings()
+
+    def _get_rental_moves(self):
+        return self.mapped("move_ids").filtered(lambda m: m.is_rental_move())
+
+    def _set_stock_moves_expected_dates(self, date_per_move_id):
+        moves = self.env["stock.move"].browse(date_per_move_id)
+        moves_to_update = moves.filtered(lambda m: not m.is_processed_move())
+        move_ids_per_date = defaultdict(list)
+
+        for move in moves_to_update:
+            move_ids_per_date[date_per_move_id[move.id]].append(move.id)
+
+        for date_, move_ids in move_ids_per_date.items():
+            moves_to_update.browse(move_ids).set_expected_date(date_)
 
 
 class SaleOrderLineWithReturnedQty(models.Model):
@@ -324,8 +369,32 @@ class SaleOrderLineWithRentalServiceReturnedQty(models.Model):
                 ("rental_date_from", "!=", False),
             ]
         )
-        lines_to_recompute.modified(["rental_date_from"])
-        lines_to_recompute.recompute()
+        lines_to_recompute._update_rental_service_qty_delivered()
+
+    def _update_rental_service_qty_delivered(self):
+        """Update the delivered quantity of rental services in batch.
+
+        Only the number of days since the start of the rental is evaluated.
+        The lines are grouped by delivered quantity, and each group is written
+        in a single query.
+
+        Lines for which the delivered quantity did not change are not written,
+        so that the fields depending on the delivered quantity
+        (such as the invoice status) are only recomputed for the other lines.
+        """
+        rental_services = self.filtered(
+            lambda l: l.qty_delivered_method == "rental_service"
+        )
+        line_ids_per_qty = defaultdict(list)
+
+        for line in rental_services:
+            qty = line._get_rental_service_qty_delivered()
+            rounding = line.product_uom.rounding
+            if float_compare(qty, line.qty_delivered, precision_rounding=rounding):
+                line_ids_per_qty[qty].append(line.id)
+
+        for qty, line_ids in line_ids_per_qty.items():
+            self.browse(line_ids)._write({"qty_delivered": qty})
 
     @api.depends(
         "kit_delivered_qty", "kit_returned_qty", "product_uom_qty", "rental_date_from"
@@ -354,3 +423,159 @@ class SaleOrderLineWithRentalServiceReturnedQty(models.Model):
         now = datetime.now()
         number_of_days = (now - self.rental_date_from).days
         return max(number_of_days + 1, 0)
+
+
+class SaleOrderLineWithRentalBooking(models.Model):
+
+    _inherit = "sale.order.line"
+
+    rental_booking_ids = fields.One2many(
+        "sale.rental.booking", "sale_line_id", "Rental Bookings"
+    )
+    rental_available_qty = fields.Float(
+        "Available Quantity",
+        compute="_compute_rental_available_qty",
+        digits=dp.get_precision("Product Unit of Measure"),
+        help="Quantity of the product available for rental during the rental period, "
+        "excluding this line.",
+    )
+
+    @api.multi
+    def write(self, vals):
+        super().write(vals)
+        if "product_id" in vals or "product_uom_qty" in vals or "product_uom" in vals:
+            self._update_rental_bookings()
+        return True
+
+    @api.depends(
+        "product_id",
+        "order_id.warehouse_id",
+        "expected_rental_date",
+        "expected_return_date",
+    )
+    def _compute_rental_available_qty(self):
+        lines = self.filtered(
+            lambda l: l._is_rental_booking_product() and l.order_id.warehouse_id
+        )
+        if not lines:
+            return
+
+        services_per_kit = lines._get_rental_services_per_kit()
+        requests = [
+            (line.product_id, line.order_id.warehouse_id)
+            + line._get_rental_booking_period(services_per_kit)
+            + (line,)
+            for line in lines
+        ]
+        available_qties = self.env["sale.rental.booking"].get_available_qty_batch(
+            requests
+        )
+        for line, available_qty in zip(lines, available_qties):
+            line.rental_available_qty = line.product_id.uom_id._compute_quantity(
+                available_qty, line.product_uom or line.product_id.uom_id
+            )
+
+    def _update_rental_bookings(self):
+        """Synchronize the rental bookings with the given sale order lines.
+
+        A booking is created for each confirmed line of a rental order
+        that books physical units of a product.
+        The booking is removed when the line no longer books any unit
+        (the order is cancelled or all units were returned).
+        """
+        bookings = self.env["sale.rental.booking"].sudo()
+        existing_bookings = {
+            b.sale_line_id: b
+            for b in bookings.search([("sale_line_id", "in", self.ids)])
+        }
+        bookings_to_unlink = bookings
+        vals_to_create = []
+        services_per_kit = self._get_rental_services_per_kit()
+
+        for line in self:
+            vals = line._get_rental_booking_vals(services_per_kit)
+            booking = existing_bookings.get(line)
+            if booking and vals:
+                booking.write(vals)
+            elif booking:
+                bookings_to_unlink |= booking
+            elif vals:
+                vals_to_create.append(dict(vals, sale_line_id=line.id))
+
+        bookings_to_unlink.unlink()
+        bookings.create(vals_to_create)
+
+    def _get_rental_booking_vals(self, services_per_kit=None):
+        if not self._is_rental_booking_required():
+            return None
+
+        product_uom = self.product_id.uom_id
+        qty = self.product_uom._compute_quantity(
+            self.product_uom_qty - self.rental_returned_qty, product_uom
+        )
+        if float_compare(qty, 0, precision_rounding=product_uom.rounding) <= 0:
+            return None
+
+        delivered_qty = self.product_uom._compute_quantity(
+            max(self.qty_delivered - self.rental_returned_qty, 0), product_uom
+        )
+        date_from, date_to = self._get_rental_booking_period(services_per_kit)
+        return {
+            "product_id": self.product_id.id,
+            "warehouse_id": self.order_id.warehouse_id.id,
+            "date_from": date_from,
+            "date_to": date_to,
+            "quantity": qty,
+            "delivered_qty": delivered_qty,
+        }
+
+    def _is_rental_booking_required(self):
+        return (
+            self.state in ("sale", "done")
+            and self.order_id.warehouse_id
+            and self._is_rental_booking_product()
+        )
+
+    def _is_rental_booking_product(self):
+        return self.is_rental_order and self.product_id.type in ("product", "consu")
+
+    def _get_rental_booking_period(self, services_per_kit=None):
+        """Get the period during which the line books units of the product.
+
+        Each expected date of the line that is not set yet
+        is replaced by the matching date of the rental service of the kit.
+
+        :param services_per_kit: the result of _get_rental_services_per_kit,
+            if already computed for multiple lines
+        """
+        if self.expected_rental_date and self.expected_return_date:
+            return self.expected_rental_date, self.expected_return_date
+
+        if services_per_kit is None:
+            services_per_kit = self._get_rental_services_per_kit()
+
+        service = services_per_kit.get(
+            (self.order_id.id, self.kit_reference), self.browse()
+        )
+        date_from = (
+            self.expected_rental_date
+            or service.rental_date_from
+            or self.order_id.date_order
+            or datetime.now()
+        )
+        date_to = self.expected_return_date or service.rental_date_to
+        return date_from, date_to
+
+    def _get_rental_services_per_kit(self):
+        """Get the rental service of each kit in the orders of the lines.
+
+        The lines of each order are browsed once.
+
+        :return: a dict mapping (order id, kit reference) to the service line
+        """
+        services_per_kit = {}
+        for line in self.mapped("order_id.order_line"):
+            if line.is_rental_service:
+                key = (line.order_id.id, line.kit_reference)
+                services_per_kit.setdefault(key, line)
+        return services_per_kit
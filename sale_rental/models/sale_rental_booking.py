@@ -0,0 +1,193 @@
+# © 2020 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from collections import defaultdict
+from datetime import timedelta
+from odoo import api, fields, models, tools
+from odoo.addons import decimal_precision as dp
+
+
+class SaleRentalBooking(models.Model):
+    """Period during which units of a product are booked by a rental order.
+
+    There is at most one booking per sale order line.
+    The bookings are indexed by product, warehouse and period,
+    so that the bookings overlapping a range of dates are found
+    without scanning the stock moves.
+    """
+
+    _name = "sale.rental.booking"
+    _description = "Rental Booking"
+    _order = "date_from, id"
+
+    sale_line_id = fields.Many2one(
+        "sale.order.line", required=True, ondelete="cascade", index=True
+    )
+    product_id = fields.Many2one("product.product", required=True, ondelete="cascade")
+    warehouse_id = fields.Many2one("stock.warehouse", required=True, ondelete="cascade")
+    date_from = fields.Datetime(required=True)
+    date_to = fields.Datetime()
+    quantity = fields.Float(digits=dp.get_precision("Product Unit of Measure"))
+    delivered_qty = fields.Float(
+        digits=dp.get_precision("Product Unit of Measure"),
+        help="Quantity delivered to the customer and not returned yet.",
+    )
+
+    _sql_constraints = [
+        (
+            "sale_line_unique",
+            "unique (sale_line_id)",
+            "A sale order line can only have one rental booking.",
+        )
+    ]
+
+    def init(self):
+        """Index the columns used to find the bookings overlapping a period."""
+        super().init()
+        tools.create_index(
+            self._cr,
+            "sale_rental_booking_period_index",
+            self._table,
+            ["product_id", "warehouse_id", "date_from", "date_to"],
+        )
+
+    @api.model
+    def get_available_qty(
+        self, product, warehouse, date_from, date_to=None, excluded_lines=None
+    ):
+        """Get the quantity of a product available for rental during a period.
+
+        The available quantity is the number of units owned by the warehouse
+        minus the highest quantity booked at any time during the period.
+
+        :param product: the product.product record
+        :param warehouse: the stock.warehouse record
+        :param date_from: the beginning of the period
+        :param date_to: the end of the period (one day after date_from by default)
+        :param excluded_lines: sale order lines for which to ignore the bookings
+        :return: the available quantity in the unit of measure of the product
+        """
+        request = (product, warehouse, date_from, date_to, excluded_lines)
+        return self.get_available_qty_batch([request])[0]
+
+    @api.model
+    def get_available_qty_batch(self, requests):
+        """Get the quantities available for rental for multiple requests.
+
+        The bookings and the units owned are fetched once for all requests.
+
+        :param requests: a list of tuples with the arguments of get_available_qty
+            (product, warehouse, date_from, date_to, excluded_lines)
+        :return: the list of available quantities, in the order of the requests
+        """
+        requests = [
+            (product, warehouse, date_from, _get_period_end(date_from, date_to), lines)
+            for product, warehouse, date_from, date_to, lines in requests
+        ]
+        products = self.env["product.product"].union(*(r[0] for r in requests))
+        warehouses = self.env["stock.warehouse"].union(*(r[1] for r in requests))
+        bookings = self._get_bookings_per_product_and_warehouse(
+            products,
+            warehouses,
+            min(r[2] for r in requests),
+            max(r[3] for r in requests),
+        )
+        fleet_qty = self._get_fleet_qty_per_product_and_warehouse(products, warehouses)
+
+        result = []
+        for product, warehouse, date_from, date_to, excluded_lines in requests:
+            key = (product.id, warehouse.id)
+            excluded_line_ids = set(excluded_lines.ids) if excluded_lines else set()
+            booked_qty = get_max_booked_qty(
+                (
+                    (b.date_from, b.date_to, b.quantity)
+                    for b in bookings[key]
+                    if b.sale_line_id.id not in excluded_line_ids
+                ),
+                date_from,
+                date_to,
+            )
+            result.append(fleet_qty[key] - booked_qty)
+
+        return result
+
+    def _get_bookings_per_product_and_warehouse(
+        self, products, warehouses, date_from, date_to
+    ):
+        bookings = self.sudo().search(
+            [
+                ("product_id", "in", products.ids),
+                ("warehouse_id", "in", warehouses.ids),
+                ("date_from", "<", date_to),
+                "|",
+                ("date_to", "=", False),
+                ("date_to", ">", date_from),
+            ]
+        )
+        result = defaultdict(list)
+        for booking in bookings:
+            result[(booking.product_id.id, booking.warehouse_id.id)].append(booking)
+        return result
+
+    def _get_fleet_qty_per_product_and_warehouse(self, products, warehouses):
+        """Get the number of units owned by each warehouse.
+
+        This includes the units in stock and the units currently rented.
+        """
+        result = defaultdict(float)
+        for warehouse in warehouses:
+            for product in products.with_context(warehouse=warehouse.id):
+                result[(product.id, warehouse.id)] = product.qty_available
+
+        rented_groups = self.sudo().read_group(
+            [
+                ("product_id", "in", products.ids),
+                ("warehouse_id", "in", warehouses.ids),
+                ("delivered_qty", ">", 0),
+            ],
+            ["product_id", "warehouse_id", "delivered_qty"],
+            ["product_id", "warehouse_id"],
+            lazy=False,
+        )
+        for group in rented_groups:
+            key = (group["product_id"][0], group["warehouse_id"][0])
+            result[key] += group["delivered_qty"]
+
+        return result
+
+
+def get_max_booked_qty(bookings, date_from, date_to):
+    """Get the highest quantity booked at the same time during a period.
+
+    The bookings are swept in chronological order.
+    When a booking ends at the time another one begins,
+    the units are considered available for the second booking.
+
+    :param bookings: an iterable of (date_from, date_to, quantity) tuples,
+        where date_to may be empty for an open-ended booking
+    :param date_from: the beginning of the period
+    :param date_to: the end of the period
+    :return: the highest quantity booked
+    """
+    events = []
+
+    for booking_from, booking_to, qty in bookings:
+        start = max(booking_from, date_from)
+        end = min(booking_to or date_to, date_to)
+        if start < end:
+            events.append((start, qty))
+            events.append((end, -qty))
+
+    events.sort()
+
+    booked_qty = 0
+    max_booked_qty = 0
+    for _date, qty in events:
+        booked_qty += qty
+        max_booked_qty = max(max_booked_qty, booked_qty)
+
+    return max_booked_qty
+
+
+def _get_period_end(date_from, date_to):
+    return date_to if date_to and date_to > date_from else date_from + timedelta(1)
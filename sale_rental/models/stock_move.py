@@ -1,6 +1,7 @@
 # © 2020 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
+from collections import defaultdict
 from datetime import datetime
 from odoo import api, fields, models
 
@@ -28,7 +29,25 @@ class StockMove(models.Model):
             super(StockMove, rental_moves_without_propagation).write(dict(vals))
             super(StockMove, other_moves).write(dict(vals))
         else:
-            return super().write(vals)
+            super().write(vals)
+
+        if "location_id" in vals:
+            self._recompute_downstream_rental_return_pickings()
+
+        return True
+
+    def _recompute_downstream_rental_return_pickings(self):
+        """Recompute the rental return flag of the pickings downstream of the moves.
+
+        The flag of a picking depends on the whole chain of origin moves
+        of its moves, which can not be expressed with api.depends.
+        """
+        move_ids_per_move = self.get_chained_move_ids(upstream=False)
+        moves = self.browse({i for ids in move_ids_per_move.values() for i in ids})
+        pickings = moves.mapped("picking_id")
+        if pickings:
+            self.env.add_todo(pickings._fields["is_rental_return"], pickings)
+            pickings.recompute()
 
     def _action_done(self):
         result = super()._action_done()
@@ -47,8 +66,18 @@ class StockMove(models.Model):
             move._update_sale_rental_service_line_returned_qty()
             move._update_sale_rental_service_line_date_to()
 
+        self._update_sale_rental_bookings()
         return result
 
+    def _action_cancel(self):
+        result = super()._action_cancel()
+        self._update_sale_rental_bookings()
+        return result
+
+    def _update_sale_rental_bookings(self):
+        sale_lines = self.sudo().mapped("sale_line_id")
+        sale_lines.filtered(lambda l: l.is_rental_order)._update_rental_bookings()
+
     def _update_sale_rental_service_line_delivered_qty(self):
         kit_line = self._get_sale_kit_line()
         service_line = self._get_sale_rental_service_line()
@@ -103,7 +132,42 @@ class StockMove(models.Model):
         self.write({"date_expected": date_})
 
     def with_all_origin_moves(self):
-        origin_moves = self.mapped("move_orig_ids")
-        if not origin_moves:
-            return self
-        return self | origin_moves.with_all_origin_moves()
+        move_ids_per_move = self.get_chained_move_ids()
+        return self.browse({i for ids in move_ids_per_move.values() for i in ids})
+
+    def get_chained_move_ids(self, upstream=True):
+        """Get the moves chained to each move of the recordset.
+
+        The whole chains are resolved with a single recursive query,
+        instead of one query per level of the chains.
+
+        :param upstream: whether to follow the origin moves or the destination moves
+        :return: a dict mapping each move id to the set of ids of its chained moves,
+            including the move itself
+        """
+        if not self.ids:
+            return {}
+
+        from_column, to_column = (
+            ("move_dest_id", "move_orig_id")
+            if upstream
+            else ("move_orig_id", "move_dest_id")
+        )
+        self._cr.execute(
+            """
+            WITH RECURSIVE chain (root_id, move_id) AS (
+                SELECT id, id FROM stock_move WHERE id IN %s
+                UNION
+                SELECT chain.root_id, rel.{to_column}
+                FROM chain
+                JOIN stock_move_move_rel rel ON rel.{from_column} = chain.move_id
+            )
+            SELECT root_id, move_id FROM chain
+            """.format(from_column=from_column, to_column=to_column),
+            (tuple(self.ids),),
+        )
+
+        move_ids_per_move = defaultdict(set)
+        for root_id, move_id in self._cr.fetchall():
+            move_ids_per_move[root_id].add(move_id)
+        return move_ids_per_move
@@ -0,0 +1,37 @@
+# © 2020 - today Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+from odoo import api, fields, models
+
+
+class StockPicking(models.Model):
+
+    _inherit = "stock.picking"
+
+    is_rental_return = fields.Boolean(
+        compute="_compute_is_rental_return",
+        store=True,
+        index=True,
+        help="Whether the picking is part of the return of rented products.",
+    )
+
+    @api.depends("move_lines.location_id", "move_lines.move_orig_ids")
+    def _compute_is_rental_return(self):
+        """Compute whether the picking is part of a rental return.
+
+        A picking is part of a rental return if one of its moves (or one of
+        their origin moves) comes from a rental customer location.
+        """
+        moves = self.mapped("move_lines")
+        origin_move_ids_per_move = moves.get_chained_move_ids()
+
+        for picking in self:
+            origin_move_ids = {
+                move_id
+                for move in picking.move_lines
+                for move_id in origin_move_ids_per_move.get(move.id, ())
+            }
+            origin_moves = moves.browse(origin_move_ids)
+            picking.is_rental_return = any(
+                m.is_rental_return_move() for m in origin_moves
+            )
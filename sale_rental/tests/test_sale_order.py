@@ -2,6 +2,7 @@
 # License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
 
 from datetime import datetime, timedelta
+from unittest.mock import patch
 from .common import RentalCase
 
 
@@ -154,6 +155,22 @@ class TestSaleOrder(SaleOrderCase):
         picking = self.env["stock.picking"].search(action["domain"])
         assert picking.location_dest_id == self.rental_location
 
+    def test_return_picking_is_rental_return(self):
+        return_move = self.get_return_move(self.line_1)
+        assert return_move.picking_id.is_rental_return
+
+    def test_delivery_picking_is_not_rental_return(self):
+        rental_move = self.get_rental_move(self.line_1)
+        assert not rental_move.picking_id.is_rental_return
+
+    def test_picking_counts_computed_per_order(self):
+        other_order = self.order.copy()
+        other_order.action_confirm()
+        orders = self.order | other_order
+        orders.invalidate_cache()
+        assert orders.mapped("rental_return_count") == [1, 1]
+        assert orders.mapped("delivery_count") == [1, 1]
+
 
 class TestSaleOrderMultipleSteps(SaleOrderCase):
     @classmethod
@@ -199,3 +216,41 @@ class TestSaleOrderMultipleSteps(SaleOrderCase):
         first_push = self.get_rental_move(self.line_1)
         second_push = first_push.move_dest_ids
         assert second_push.date_expected == self.date_end_1
+
+    def test_with_all_origin_moves(self):
+        first_pull = self.get_rental_move(self.line_1)
+        second_pull = first_pull.move_orig_ids
+        assert first_pull.with_all_origin_moves() == first_pull | second_pull
+
+    def test_get_chained_move_ids_downstream(self):
+        first_pull = self.get_rental_move(self.line_1)
+        second_pull = first_pull.move_orig_ids
+        first_push = first_pull.move_dest_ids
+        move_ids_per_move = second_pull.get_chained_move_ids(upstream=False)
+        assert first_pull.id in move_ids_per_move[second_pull.id]
+        assert first_push.id in move_ids_per_move[second_pull.id]
+
+    def test_is_rental_return_updated_when_origin_location_changes(self):
+        lines = self.line_1 | self.line_2
+        first_pushes = lines.mapped("move_ids").filtered(
+            lambda m: m.location_dest_id == self.rental_location
+        )
+        second_pickings = first_pushes.mapped("move_dest_ids.picking_id")
+        assert second_pickings.is_rental_return
+
+        first_pushes.write({"location_id": self.warehouse.lot_stock_id.id})
+        assert not second_pickings.is_rental_return
+
+    def test_expected_dates_written_once_per_date(self):
+        lines = self.line_1 | self.line_2
+        new_date_start = datetime.now() + timedelta(3)
+        new_date_end = datetime.now() + timedelta(9)
+        stock_move = self.env.registry["stock.move"]
+        with patch.object(stock_move, "set_expected_date") as set_expected_date:
+            lines.write(
+                {
+                    "expected_rental_date": new_date_start,
+                    "expected_return_date": new_date_end,
+                }
+            )
+        assert set_expected_date.call_count == 2
@@ -46,6 +46,14 @@ class TestKitRental(KitRentalCase):
         service = self.get_rental_service_lines()
         assert service.is_rental_service
 
+    def test_rental_service_prepared_before_components(self):
+        line = self.new_so_line()
+        line.is_rental_order = self.order.is_rental
+        self.select_product(line, self.kit)
+        components = line.prepare_kit_components()
+        assert len(components) == 4
+        assert components[0].product_id == self.rental_service
+
     def test_rental_service_kit_reference(self):
         self.add_kit_on_sale_order()
         self.add_kit_on_sale_order()
@@ -4,6 +4,7 @@
 from ddt import ddt, data, unpack
 from datetime import datetime, timedelta
 from freezegun import freeze_time
+from unittest.mock import patch
 from .common import SaleOrderKitCase
 
 
@@ -41,6 +42,81 @@ class TestSaleOrderLineDeliveredQty(SaleOrderKitCase):
         assert self.component_2a.expected_rental_date == date_from
         assert self.component_2a.expected_return_date == date_to
 
+    def test_rental_dates_propagated_on_order_create(self):
+        date_from = datetime.now() + timedelta(10)
+        date_to = datetime.now() + timedelta(20)
+        order = self.order.copy(
+            {
+                "order_line": [
+                    (0, 0, self._get_line_vals("K1", self.component_a)),
+                    (0, 0, self._get_line_vals("K1", self.component_b)),
+                    (
+                        0,
+                        0,
+                        dict(
+                            self._get_line_vals("K1", self.rental_service),
+                            is_rental_service=True,
+                            rental_date_from=date_from,
+                            rental_date_to=date_to,
+                        ),
+                    ),
+                ]
+            }
+        )
+        assert order.order_line.mapped("expected_rental_date") == [date_from] * 3
+        assert order.order_line.mapped("expected_return_date") == [date_to] * 3
+
+    def test_rental_dates_propagated_on_order_write(self):
+        date_from = datetime.now() + timedelta(10)
+        self.order.write(
+            {
+                "order_line": [
+                    (1, self.service_1.id, {"rental_date_from": date_from}),
+                    (0, 0, self._get_line_vals("K1", self.component_b)),
+                ]
+            }
+        )
+        kit_lines = self.order.order_line.filtered(lambda l: l.kit_reference == "K1")
+        assert kit_lines.mapped("expected_rental_date") == [date_from] * len(kit_lines)
+
+    def test_order_write_propagates_only_changed_kits(self):
+        date_from = datetime.now() + timedelta(10)
+        line_model = self.env.registry["sale.order.line"]
+        with patch.object(
+            line_model, "propagate_service_rental_dates", autospec=True
+        ) as propagate:
+            self.order.write(
+                {
+                    "order_line": [
+                        (1, self.service_1.id, {"rental_date_from": date_from}),
+                        (1, self.component_2a.id, {"name": "Updated Component"}),
+                    ]
+                }
+            )
+
+        propagated_lines = propagate.call_args[0][0]
+        assert propagated_lines == self.service_1
+
+    def test_rental_dates_written_once_per_date_pair(self):
+        date_from = datetime.now() + timedelta(10)
+        self.make_service_line("K2", self.rental_service, date_from, None, 1)
+        services = self.order.order_line.filtered(lambda l: l.is_rental_service)
+
+        line_model = self.env.registry["sale.order.line"]
+        with patch.object(line_model, "propagate_stock_rental_dates") as propagate:
+            services.write({"rental_date_from": datetime.now() + timedelta(11)})
+
+        assert propagate.call_count == 1
+
+    def _get_line_vals(self, kit_reference, product):
+        return {
+            "product_id": product.id,
+            "name": product.display_name,
+            "product_uom_qty": 1,
+            "product_uom": product.uom_id.id,
+            "kit_reference": kit_reference,
+        }
+
     @data(
         (datetime(2020, 1, 1), datetime(2020, 1, 1, 23, 59, 59), 1),
         (datetime(2020, 1, 1), datetime(2020, 1, 2), 1),
@@ -3,6 +3,7 @@
 
 from datetime import datetime, timedelta
 from freezegun import freeze_time
+from unittest.mock import patch
 from .common import SaleOrderKitCase, RentalCase
 
 
@@ -77,6 +78,28 @@ class TestKitRental(SaleOrderKitCase):
 
         assert self.service_1.qty_delivered == number_of_days_since_start + 1
 
+    def test_service_line_qty_delivered_unchanged(self):
+        self.service_1.rental_date_from = datetime.now()
+        self.deliver_important_components()
+        line_class = self.env.registry["sale.order.line"]
+        with patch.object(line_class, "_write") as write:
+            self.service_1._update_rental_service_qty_delivered()
+        assert not write.called
+
+    def test_service_lines_updated_together(self):
+        self.service_1.rental_date_from = datetime.now()
+        self.deliver_important_components()
+        service_2 = self.service_1.copy(
+            {"order_id": self.order.id, "kit_reference": "K2"}
+        )
+        service_2.kit_delivered_qty = 1
+        lines = self.service_1 | service_2
+
+        with freeze_time(datetime.now() + timedelta(5)):
+            lines._update_rental_service_qty_delivered()
+
+        assert lines.mapped("qty_delivered") == [6, 6]
+
     def _run_service_line_qty_delivered_cron(self):
         cron = self.env.ref("sale_rental.rental_service_qty_delivered_update_cron")
         cron.method_direct_trigger()
@@ -0,0 +1,122 @@
+# © 2020 Numigi (tm) and all its contributors (https://bit.ly/numigiens)
+# License LGPL-3.0 or later (http://www.gnu.org/licenses/lgpl).
+
+import unittest
+from ddt import ddt, data, unpack
+from datetime import datetime
+from odoo.addons.sale_rental.models.sale_rental_booking import get_max_booked_qty
+from .common import SaleOrderKitCase
+
+
+@ddt
+class TestMaxBookedQty(unittest.TestCase):
+
+    bookings = [
+        (datetime(2020, 1, 1), datetime(2020, 1, 5), 2),
+        (datetime(2020, 1, 3), datetime(2020, 1, 10), 3),
+        (datetime(2020, 1, 10), None, 4),
+    ]
+
+    @data(
+        (datetime(2020, 1, 1), datetime(2020, 1, 2), 2),
+        (datetime(2020, 1, 1), datetime(2020, 1, 3), 2),
+        (datetime(2020, 1, 1), datetime(2020, 1, 4), 5),
+        (datetime(2020, 1, 5), datetime(2020, 1, 10), 3),
+        (datetime(2020, 1, 6), datetime(2020, 1, 11), 4),
+        (datetime(2021, 1, 1), datetime(2021, 1, 2), 4),
+        (datetime(2019, 1, 1), datetime(2019, 1, 2), 0),
+    )
+    @unpack
+    def test_max_booked_qty(self, date_from, date_to, expected_qty):
+        qty = get_max_booked_qty(self.bookings, date_from, date_to)
+        assert qty == expected_qty
+
+
+class TestSaleRentalBooking(SaleOrderKitCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.date_from = datetime(2030, 1, 10)
+        cls.date_to = datetime(2030, 1, 20)
+        cls.service_1.write(
+            {"rental_date_from": cls.date_from, "rental_date_to": cls.date_to}
+        )
+        cls.env["stock.quant"]._update_available_quantity(
+            cls.component_a, cls.warehouse.lot_stock_id, 10
+        )
+
+    def test_one_booking_per_rented_product(self):
+        lines = self.component_1a | self.component_1b | self.component_1z
+        bookings = lines.mapped("rental_booking_ids")
+        assert len(bookings) == 3
+        assert bookings.mapped("warehouse_id") == self.warehouse
+
+    def test_no_booking_for_services(self):
+        assert not self.service_1.rental_booking_ids
+        assert not self.kit_line.rental_booking_ids
+
+    def test_booking_dates_propagated_from_rental_service(self):
+        booking = self.component_1a.rental_booking_ids
+        assert booking.date_from == self.date_from
+        assert booking.date_to == self.date_to
+        assert booking.quantity == 2
+
+    def test_expected_return_date_used_without_expected_rental_date(self):
+        self.component_2a.expected_return_date = datetime(2030, 1, 20)
+        booking = self.component_2a.rental_booking_ids
+        assert booking.date_to == datetime(2030, 1, 20)
+
+    def test_available_qty_during_rental(self):
+        qty = self.component_a.get_rental_available_qty(
+            datetime(2030, 1, 15), datetime(2030, 1, 16), self.warehouse
+        )
+        assert qty == 10 - 2 - 1
+
+    def test_available_qty_after_rental(self):
+        self.component_2a.expected_return_date = datetime(2030, 1, 20)
+        qty = self.component_a.get_rental_available_qty(
+            datetime(2030, 1, 20), datetime(2030, 1, 25), self.warehouse
+        )
+        assert qty == 10
+
+    def test_available_qty_batch(self):
+        qties = self.env["sale.rental.booking"].get_available_qty_batch(
+            [
+                (
+                    self.component_a,
+                    self.warehouse,
+                    datetime(2030, 1, 15),
+                    datetime(2030, 1, 16),
+                    None,
+                ),
+                (
+                    self.component_a,
+                    self.warehouse,
+                    datetime(2030, 1, 20),
+                    datetime(2030, 1, 25),
+                    self.component_2a,
+                ),
+            ]
+        )
+        assert qties == [10 - 2 - 1, 10]
+
+    def test_delivered_units_are_part_of_the_fleet(self):
+        self.deliver_product(self.component_1a, 2)
+        booking = self.component_1a.rental_booking_ids
+        assert booking.delivered_qty == 2
+        qty = self.component_a.get_rental_available_qty(
+            datetime(2030, 1, 15), datetime(2030, 1, 16), self.warehouse
+        )
+        assert qty == 10 - 2 - 1
+
+    def test_booking_removed_when_returned(self):
+        self.deliver_product(self.component_1a, 2)
+        self.return_product(self.component_1a, 2)
+        assert not self.component_1a.rental_booking_ids
+
+    def test_bookings_removed_when_order_cancelled(self):
+        self.order.action_cancel()
+        assert not self.order.mapped("order_line.rental_booking_ids")
+
+    def test_available_qty_on_order_line_excludes_the_line(self):
+        assert self.component_1a.rental_available_qty == 10 - 1
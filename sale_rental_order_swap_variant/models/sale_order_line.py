@@ -25,8 +25,8 @@ class SaleOrderLine(models.Model):
                 and (line.allow_change_variant or line.allow_change_product)
             )
 
-    def prepare_kit_component(self, kit_line):
-        new_line = super().prepare_kit_component(kit_line)
+    def prepare_kit_component(self, kit_line, component_values=None):
+        new_line = super().prepare_kit_component(kit_line, component_values)
         new_line.allow_change_variant = kit_line.allow_change_variant
         new_line.allow_change_product = kit_line.allow_change_product
         return new_line